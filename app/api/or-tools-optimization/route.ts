@@ -191,17 +191,17 @@ export async function POST(req: NextRequest) {
             confidence: [pred.confidence]
           }));
 
-          result = await service.optimizeRedistribution(ports, containers, routes, formattedPredictions);
+          result = await service.optimizeRedistribution(ports, containers, routes, formattedPredictions, undefined, req.signal);
         } catch (lstmError) {
           console.log('LSTM predictions failed, using OR-Tools only:', lstmError);
-          result = await service.optimizeRedistribution(ports, containers, routes);
+          result = await service.optimizeRedistribution(ports, containers, routes, undefined, undefined, req.signal);
         }
 
       } else if (optimization_type === 'routing') {
-        result = await service.optimizeRouting(relocations || [], routes);
+        result = await service.optimizeRouting(relocations || [], routes, req.signal);
         
       } else if (optimization_type === 'assignment') {
-        result = await service.optimizeAssignment(containers, demands || [], routes);
+        result = await service.optimizeAssignment(containers, demands || [], routes, req.signal);
         
       } else if (optimization_type === 'comprehensive') {
         result = await service.optimizeComprehensive(
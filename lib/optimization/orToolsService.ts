@@ -4,13 +4,79 @@ import * as path from 'path';
 import * as os from 'os';
 
 export interface OptimizationInput {
-  optimization_type: 'redistribution' | 'routing' | 'assignment';
+  optimization_type: 'redistribution' | 'routing' | 'assignment' | 'batch';
   ports: PortData[];
   containers: ContainerData[];
   routes: RouteData[];
   relocations?: RelocationData[];
   demands?: DemandData[];
   lstm_predictions?: LSTMPrediction[];
+  options?: SolverOptions;
+  scenarios?: ScenarioInput[];
+  scenario_type?: 'redistribution' | 'routing' | 'assignment';
+  previous_solution?: PreviousSolution;
+}
+
+// Earlier redistribution result used to warm-start the solver
+export interface PreviousSolution {
+  relocations?: OptimizationResult['relocations'];
+  storage_plan?: OptimizationResult['storage_plan'];
+}
+
+export interface ScenarioInput {
+  id?: string;
+  optimization_type?: 'redistribution' | 'routing' | 'assignment';
+  options?: SolverOptions;
+  ports?: Array<Partial<PortData> & { name: string }>;
+  routes?: Array<Partial<RouteData> & { from: string; to: string }>;
+  containers?: ContainerData[];
+  relocations?: RelocationData[];
+  demands?: DemandData[];
+}
+
+export interface BatchOptimizationResult {
+  results: Array<{
+    id?: string;
+    optimization_type: string;
+    wall_time_seconds: number;
+    result: OptimizationResult;
+  }>;
+  batch_stats?: {
+    scenarios: number;
+    failed: number;
+    workers: number;
+    wall_time_seconds: number;
+  };
+  error?: string;
+  execution_time?: number;
+  python_logs?: string;
+}
+
+export interface SolverOptions {
+  time_limit_seconds?: number;
+  relative_gap?: number;
+  num_threads?: number;
+  arc_model?: 'sparse' | 'dense';
+  neighbors_k?: number;
+  min_cost_flow?: boolean;
+  interchangeable_types?: boolean;
+  time_horizon?: number;
+  window_days?: number;
+  commit_days?: number;
+  assignment_solver?: 'lsa' | 'mip';
+  assignment_workers?: number;
+  parallel_min_pairs?: number;
+  vehicles?: number;
+  vehicle_capacity?: number | number[];
+  routing_time_limit_seconds?: number;
+  batch_workers?: number;
+  // The optimizer's msgpack output and stream_relocations are CLI-only; results
+  // here are parsed as a single JSON document
+  output_format?: 'json' | 'compact';
+  storage_plan_format?: 'nested' | 'flat';
+  warm_start_offset_days?: number;
+  measure_warm_start?: boolean;
+  warm_start_probe_seconds?: number;
 }
 
 export interface PortData {
@@ -66,8 +132,15 @@ export interface LSTMPrediction {
 }
 
 export interface OptimizationResult {
-  status: 'optimal' | 'fallback' | 'error';
+  status: 'optimal' | 'feasible' | 'fallback' | 'error';
   total_cost?: number;
+  solver_stats?: {
+    status: 'optimal' | 'feasible';
+    // null for rolling-horizon plans, which are not solved as one model
+    best_bound: number | null;
+    gap: number | null;
+    wall_time_seconds: number;
+  };
   relocations?: Array<{
     from_port: string;
     to_port: string;
@@ -89,18 +162,70 @@ export interface OptimizationResult {
     stops: RelocationData[];
     total_distance: number;
   }>;
+  warm_start?: {
+    applied: boolean;
+    reason?: string;
+    hinted_variables?: number;
+    relocations_mapped?: number;
+    relocations_dropped?: number;
+    storage_hint?: 'implied' | 'previous_plan';
+    clipped_values?: number;
+    time_to_first_feasible_seconds?: { cold: number | null; warm: number | null };
+    speedup?: number;
+  };
   recommendations: string[];
   error?: string;
   execution_time?: number;
   python_logs?: string;
 }
 
+// Solver time limit, kept below the 60s process timeout so a feasible plan is returned
+const DEFAULT_SOLVER_TIME_LIMIT_SECONDS = 50;
+
+// Minimum process timeout; longer solver budgets extend it (see processTimeoutSeconds)
+const DEFAULT_PROCESS_TIMEOUT_SECONDS = 60;
+
+// Time allowed beyond the solver budget for loading input and writing results
+const PROCESS_TIMEOUT_GRACE_SECONDS = 10;
+
+// Containers serialized per write when streaming optimizer input
+const INPUT_CHUNK_SIZE = 5000;
+
+export interface DaemonStats {
+  started: string;
+  submitted: number;
+  completed: number;
+  failed: number;
+  cancelled: number;
+  timed_out: number;
+  rejected: number;
+  queue_depth: number;
+  running: string[];
+  avg_run_seconds: number | null;
+  workers: number;
+  max_queue: number;
+}
+
+interface DaemonResponse {
+  id: string;
+  command: string;
+  status: 'success' | 'error' | 'cancelled' | 'timeout';
+  error?: string;
+  result?: any;
+  stats?: DaemonStats;
+  timings?: { queued_seconds: number; run_seconds: number };
+}
+
 export class ORToolsService {
   private pythonPath: string;
   private scriptPath: string;
   private tempDir: string;
   private isInitialized: boolean = false;
   private initializationError: string | null = null;
+  private daemon: ChildProcess | null = null;
+  private daemonBuffer: string = '';
+  private daemonRequests = new Map<string, { resolve: (r: DaemonResponse) => void; reject: (e: Error) => void }>();
+  private daemonRequestCounter: number = 0;
 
   constructor() {
     this.pythonPath = 'python'; // Will try to find Python in PATH
@@ -143,17 +268,20 @@ export class ORToolsService {
     ports: PortData[],
     containers: ContainerData[],
     routes: RouteData[],
-    lstmPredictions?: LSTMPrediction[]
+    lstmPredictions?: LSTMPrediction[],
+    previousSolution?: PreviousSolution,
+    signal?: AbortSignal
   ): Promise<OptimizationResult> {
     const input: OptimizationInput = {
       optimization_type: 'redistribution',
       ports: this.enhancePortsWithLSTM(ports, lstmPredictions),
       containers,
       routes,
-      lstm_predictions: lstmPredictions
+      lstm_predictions: lstmPredictions,
+      previous_solution: previousSolution
     };
 
-    return this.runOptimization(input);
+    return this.runOptimization(input, signal);
   }
 
   /**
@@ -161,7 +289,8 @@ export class ORToolsService {
    */
   async optimizeRouting(
     relocations: RelocationData[],
-    routes: RouteData[]
+    routes: RouteData[],
+    signal?: AbortSignal
   ): Promise<OptimizationResult> {
     const input: OptimizationInput = {
       optimization_type: 'routing',
@@ -171,7 +300,7 @@ export class ORToolsService {
       relocations
     };
 
-    return this.runOptimization(input);
+    return this.runOptimization(input, signal);
   }
 
   /**
@@ -180,7 +309,8 @@ export class ORToolsService {
   async optimizeAssignment(
     containers: ContainerData[],
     demands: DemandData[],
-    routes: RouteData[]
+    routes: RouteData[],
+    signal?: AbortSignal
   ): Promise<OptimizationResult> {
     const input: OptimizationInput = {
       optimization_type: 'assignment',
@@ -190,7 +320,55 @@ export class ORToolsService {
       demands
     };
 
-    return this.runOptimization(input);
+    return this.runOptimization(input, signal);
+  }
+
+  /**
+   * Solve many what-if scenarios against the same network in one Python process
+   */
+  async optimizeScenarios(
+    ports: PortData[],
+    containers: ContainerData[],
+    routes: RouteData[],
+    scenarios: ScenarioInput[],
+    options?: SolverOptions,
+    signal?: AbortSignal
+  ): Promise<BatchOptimizationResult> {
+    if (!this.isInitialized) {
+      await this.initialize();
+    }
+
+    const startTime = Date.now();
+    const input: OptimizationInput = {
+      optimization_type: 'batch',
+      ports,
+      containers,
+      routes,
+      scenarios,
+      options: { time_limit_seconds: DEFAULT_SOLVER_TIME_LIMIT_SECONDS, output_format: 'compact', ...options }
+    };
+
+    const inputFile = path.join(this.tempDir, `optimization_batch_${Date.now()}.ndjson`);
+    try {
+      this.writeInputFile(inputFile, input);
+      const result = await this.executePythonScript<BatchOptimizationResult>(
+        inputFile, this.processTimeoutSeconds(input), signal
+      );
+      result.execution_time = Date.now() - startTime;
+      console.log(`✅ OR-Tools batch of ${scenarios.length} scenarios completed in ${result.execution_time}ms`);
+      return result;
+    } catch (error) {
+      console.error('❌ OR-Tools batch optimization error:', error);
+      return {
+        results: [],
+        error: error instanceof Error ? error.message : 'Unknown optimization error',
+        execution_time: Date.now() - startTime
+      };
+    } finally {
+      if (fs.existsSync(inputFile)) {
+        fs.unlinkSync(inputFile);
+      }
+    }
   }
 
   /**
@@ -262,7 +440,7 @@ export class ORToolsService {
     }
   }
 
-  private async runOptimization(input: OptimizationInput): Promise<OptimizationResult> {
+  private async runOptimization(input: OptimizationInput, signal?: AbortSignal): Promise<OptimizationResult> {
     if (!this.isInitialized) {
       if (this.initializationError) {
         return {
@@ -278,11 +456,16 @@ export class ORToolsService {
 
     try {
       // Create temporary input file
-      const inputFile = path.join(this.tempDir, `optimization_input_${Date.now()}.json`);
-      fs.writeFileSync(inputFile, JSON.stringify(input, null, 2));
+      const inputFile = path.join(this.tempDir, `optimization_input_${Date.now()}.ndjson`);
+      const options: SolverOptions = {
+        time_limit_seconds: DEFAULT_SOLVER_TIME_LIMIT_SECONDS,
+        output_format: 'compact',
+        ...input.options
+      };
+      this.writeInputFile(inputFile, { ...input, options });
 
       // Run Python optimization
-      const result = await this.executePythonScript(inputFile);
+      const result = await this.executePythonScript(inputFile, this.processTimeoutSeconds({ ...input, options }), signal);
       
       // Cleanup temporary file
       fs.unlinkSync(inputFile);
@@ -304,8 +487,77 @@ export class ORToolsService {
     }
   }
 
-  private async executePythonScript(inputFile: string): Promise<OptimizationResult> {
+  /**
+   * Seconds to wait for an optimization before killing it: the solver budget
+   * the input allows (time limit per rolling-horizon window, the routing
+   * search limit, or batch rounds of scenario limits) plus a grace period,
+   * and never less than DEFAULT_PROCESS_TIMEOUT_SECONDS
+   */
+  private processTimeoutSeconds(input: OptimizationInput): number {
+    const solveBudget = (type: string, options: SolverOptions): number => {
+      if (type === 'routing') {
+        return options.routing_time_limit_seconds ?? 0;
+      }
+      const limit = options.time_limit_seconds ?? 0;
+      const horizon = options.time_horizon ?? 7;
+      if (type === 'redistribution' && options.window_days && options.window_days < horizon) {
+        const commitDays = options.commit_days ?? Math.max(1, Math.floor(options.window_days / 2));
+        return limit * Math.ceil(horizon / commitDays);
+      }
+      return limit;
+    };
+
+    const options = input.options ?? {};
+    let budget: number;
+    if (input.optimization_type === 'batch') {
+      // Scenarios run batch_workers at a time, each up to its own budget
+      const scenarios = input.scenarios ?? [];
+      const workers = Math.max(1, Math.min(options.batch_workers ?? os.cpus().length, scenarios.length));
+      const scenarioBudget = Math.max(0, ...scenarios.map(scenario => solveBudget(
+        scenario.optimization_type ?? input.scenario_type ?? 'redistribution',
+        { ...options, ...scenario.options }
+      )));
+      budget = Math.ceil(scenarios.length / workers) * scenarioBudget;
+    } else {
+      budget = solveBudget(input.optimization_type, options);
+    }
+
+    return Math.max(DEFAULT_PROCESS_TIMEOUT_SECONDS, budget + PROCESS_TIMEOUT_GRACE_SECONDS);
+  }
+
+  /**
+   * Write optimizer input as NDJSON: the document without containers on the
+   * first line, then one container per line, written in chunks so the full
+   * serialized fleet never has to exist as one string
+   */
+  private writeInputFile(inputFile: string, input: OptimizationInput): void {
+    const { containers, ...header } = input;
+    const fd = fs.openSync(inputFile, 'w');
+    try {
+      fs.writeSync(fd, JSON.stringify(header) + '\n');
+      for (let i = 0; i < containers.length; i += INPUT_CHUNK_SIZE) {
+        const lines = containers.slice(i, i + INPUT_CHUNK_SIZE).map(c => JSON.stringify(c));
+        fs.writeSync(fd, lines.join('\n') + '\n');
+      }
+    } finally {
+      fs.closeSync(fd);
+    }
+  }
+
+  private async executePythonScript<T extends { python_logs?: string } = OptimizationResult>(
+    inputFile: string,
+    timeoutSeconds: number = DEFAULT_PROCESS_TIMEOUT_SECONDS,
+    signal?: AbortSignal
+  ): Promise<T> {
+    if (this.daemon) {
+      return this.executeDaemonJob<T>(inputFile, timeoutSeconds, signal);
+    }
+
     return new Promise((resolve, reject) => {
+      if (signal?.aborted) {
+        reject(new Error('Optimization aborted'));
+        return;
+      }
       const pythonProcess = spawn(this.pythonPath, [this.scriptPath, inputFile]);
       
       let stdout = '';
@@ -320,6 +572,8 @@ export class ORToolsService {
       });
       
       pythonProcess.on('close', (code) => {
+        clearTimeout(timer);
+        signal?.removeEventListener('abort', onAbort);
         if (code === 0) {
           try {
             const result = JSON.parse(stdout);
@@ -338,11 +592,160 @@ export class ORToolsService {
       });
 
       // Set timeout
-      setTimeout(() => {
+      const timer = setTimeout(() => {
+        pythonProcess.kill();
+        reject(new Error(`Python optimization timeout (${timeoutSeconds}s)`));
+      }, timeoutSeconds * 1000);
+
+      const onAbort = () => {
         pythonProcess.kill();
-        reject(new Error('Python optimization timeout (60s)'));
-      }, 60000);
+        reject(new Error('Optimization aborted'));
+      };
+      signal?.addEventListener('abort', onAbort, { once: true });
+    });
+  }
+
+  /**
+   * Start a long-lived optimizer process; later optimizations are queued on
+   * it instead of spawning Python and importing OR-Tools for every call
+   */
+  startDaemon(workers: number = 2, maxQueue: number = 64): void {
+    if (this.daemon) {
+      return;
+    }
+
+    const daemon = spawn(this.pythonPath, [
+      this.scriptPath, '--daemon',
+      '--workers', String(workers),
+      '--max-queue', String(maxQueue)
+    ]);
+
+    daemon.stdout!.on('data', (data) => {
+      this.daemonBuffer += data.toString();
+      let newline: number;
+      while ((newline = this.daemonBuffer.indexOf('\n')) >= 0) {
+        const line = this.daemonBuffer.slice(0, newline);
+        this.daemonBuffer = this.daemonBuffer.slice(newline + 1);
+        if (!line.trim()) continue;
+        try {
+          const response: DaemonResponse = JSON.parse(line);
+          const pending = this.daemonRequests.get(response.id);
+          if (pending) {
+            this.daemonRequests.delete(response.id);
+            pending.resolve(response);
+          }
+        } catch (parseError) {
+          console.error('❌ Failed to parse optimizer daemon output:', parseError);
+        }
+      }
+    });
+
+    daemon.stderr!.on('data', (data) => {
+      console.log(`[optimizer] ${data.toString().trimEnd()}`);
+    });
+
+    daemon.on('close', (code) => {
+      this.daemon = null;
+      this.daemonBuffer = '';
+      for (const pending of this.daemonRequests.values()) {
+        pending.reject(new Error(`Optimizer daemon exited with code ${code}`));
+      }
+      this.daemonRequests.clear();
     });
+
+    daemon.on('error', (error) => {
+      console.error('❌ Failed to start optimizer daemon:', error.message);
+    });
+
+    this.daemon = daemon;
+    console.log(`🔧 OR-Tools optimizer daemon started with ${workers} workers`);
+  }
+
+  /**
+   * Stop the optimizer daemon after its queued jobs finish
+   */
+  stopDaemon(): void {
+    this.daemon?.stdin!.end();
+  }
+
+  /**
+   * Queue depth, running jobs and timing counters of the optimizer daemon
+   */
+  async getDaemonStats(): Promise<DaemonStats | null> {
+    if (!this.daemon) {
+      return null;
+    }
+    const response = await this.sendDaemonRequest({ command: 'stats' });
+    return response.stats ?? null;
+  }
+
+  /**
+   * Cancel a queued or running daemon job by id (optimize calls given an
+   * AbortSignal send this themselves when it fires)
+   */
+  async cancelDaemonJob(jobId: string): Promise<boolean> {
+    if (!this.daemon) {
+      return false;
+    }
+    const response = await this.sendDaemonRequest({ command: 'cancel', job_id: jobId });
+    return response.status === 'success';
+  }
+
+  /**
+   * Send a request to the daemon and wait for its response. If the timeout
+   * passes or the signal aborts first, the request is dropped and the daemon
+   * is told to cancel it, so its worker is freed for the next job
+   */
+  private sendDaemonRequest(
+    request: Record<string, unknown>,
+    timeoutSeconds?: number,
+    signal?: AbortSignal
+  ): Promise<DaemonResponse> {
+    const id = `job_${++this.daemonRequestCounter}`;
+    return new Promise((resolve, reject) => {
+      if (signal?.aborted) {
+        reject(new Error('Optimization aborted'));
+        return;
+      }
+
+      const settle = () => {
+        clearTimeout(timer);
+        signal?.removeEventListener('abort', onAbort);
+        this.daemonRequests.delete(id);
+      };
+      const abandon = (error: Error) => {
+        settle();
+        reject(error);
+        this.daemon?.stdin!.write(JSON.stringify({ command: 'cancel', job_id: id, id: `${id}_cancel` }) + '\n');
+      };
+      const onAbort = () => abandon(new Error('Optimization aborted'));
+      const timer = timeoutSeconds === undefined ? undefined : setTimeout(
+        () => abandon(new Error(`Optimizer daemon timeout (${timeoutSeconds}s)`)),
+        timeoutSeconds * 1000
+      );
+      signal?.addEventListener('abort', onAbort, { once: true });
+
+      this.daemonRequests.set(id, {
+        resolve: (response) => { settle(); resolve(response); },
+        reject: (error) => { settle(); reject(error); }
+      });
+      this.daemon!.stdin!.write(JSON.stringify({ ...request, id }) + '\n');
+    });
+  }
+
+  private async executeDaemonJob<T>(inputFile: string, timeoutSeconds: number, signal?: AbortSignal): Promise<T> {
+    // The daemon times the run itself; this also bounds time spent queued
+    const response = await this.sendDaemonRequest({
+      command: 'optimize',
+      input_file: inputFile,
+      timeout_seconds: timeoutSeconds
+    }, timeoutSeconds + PROCESS_TIMEOUT_GRACE_SECONDS, signal);
+
+    if (response.result) {
+      console.log(`🔧 Optimizer job ${response.id}: queued ${response.timings?.queued_seconds}s, ran ${response.timings?.run_seconds}s`);
+      return response.result as T;
+    }
+    throw new Error(response.error || `Optimizer job ${response.status}`);
   }
 
   private async verifyPythonEnvironment(): Promise<void> {
@@ -489,6 +892,7 @@ export class ORToolsService {
    * Clean up resources
    */
   dispose(): void {
+    this.stopDaemon();
     this.isInitialized = false;
     this.initializationError = null;
     console.log('🧹 OR-Tools service disposed');
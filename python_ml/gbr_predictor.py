@@ -6,10 +6,12 @@ Optimized for short-term (1-3 days) predictions with high interpretability
 
 Features:
 - XGBoost, LightGBM, and Scikit-learn GBR support
-- Automatic hyperparameter tuning
+- Automatic hyperparameter tuning (parallel successive-halving search)
 - Feature importance analysis
 - Confidence scoring based on tree variance
 - JSON I/O for Node.js integration
+- Columnar input (Parquet, Arrow IPC, memory-mapped .npy + schema sidecar)
+- Long-lived serve mode (NDJSON over stdin/stdout or TCP) with hot reload
 """
 
 import sys
@@ -17,8 +19,8 @@ import io
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import warnings
 warnings.filterwarnings('ignore')
@@ -38,13 +40,318 @@ except ImportError:
     HAS_LIGHTGBM = False
     print("[WARNING]  LightGBM not available, will use scikit-learn GBR")
 
+# Optional: Arrow/Parquet columnar input
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+import copy
 import joblib
 import json
 import sys
 import os
+import time
+import threading
+import socketserver
+import multiprocessing
+from multiprocessing import shared_memory
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
+class CategoryEncoder:
+    """
+    Vectorized categorical encoder with a fixed vocabulary
+
+    Codes match sklearn's LabelEncoder (index into sorted classes_), so models
+    trained with either encoder are interchangeable. Values missing from the
+    vocabulary map to a dedicated unknown code (len(classes_)) instead of being
+    silently aliased to an existing category.
+    """
+
+    def __init__(self, classes=None):
+        self.classes_ = np.asarray(classes if classes is not None else [], dtype=object)
+
+    @property
+    def unknown_code(self):
+        """Code assigned to values outside the fitted vocabulary"""
+        return len(self.classes_)
+
+    @classmethod
+    def from_label_encoder(cls, encoder):
+        """Build an equivalent encoder from a fitted sklearn LabelEncoder"""
+        return cls(encoder.classes_)
+
+    def fit(self, values):
+        """Fit vocabulary from an iterable of values"""
+        self.classes_ = np.unique(pd.Series(values).astype(str).to_numpy(dtype=object))
+        return self
+
+    def transform(self, values):
+        """
+        Encode a whole column in one vectorized pass
+
+        Args:
+            values: Iterable of category values
+
+        Returns:
+            NumPy int64 array of codes
+        """
+        series = pd.Series(values)
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Dictionary-encoded input: encode the small category list once, then
+            # gather by code (code -1 means missing, which encodes like str(NaN))
+            lookup = self.transform(np.append(series.cat.categories.astype(str).to_numpy(dtype=object), 'nan'))
+            return lookup[series.cat.codes.to_numpy()]
+
+        categorical = pd.Categorical(series.astype(str), categories=self.classes_)
+        codes = categorical.codes.astype(np.int64)
+        codes[codes < 0] = self.unknown_code
+        return codes
+
+    def fit_transform(self, values):
+        """Fit vocabulary and encode values"""
+        return self.fit(values).transform(values)
+
+    def extend(self, values):
+        """
+        Append unseen values to the vocabulary without remapping existing codes
+
+        Args:
+            values: Iterable of category values
+
+        Returns:
+            Number of categories added
+        """
+        unique = pd.unique(pd.Series(values).astype(str).to_numpy(dtype=object))
+        new_classes = unique[~pd.Series(unique).isin(self.classes_).to_numpy()]
+
+        if len(new_classes) > 0:
+            self.classes_ = np.concatenate([self.classes_, np.asarray(new_classes, dtype=object)])
+
+        return len(new_classes)
+
+
+class RollingOriginCV:
+    """
+    Rolling-origin (expanding window) cross-validation for time-ordered data
+
+    Rows are split into n_splits + 1 consecutive blocks in time order; fold k
+    trains on blocks 0..k and tests on block k + 1, so a fold never trains on
+    the future. Fold fits share one pre-binned dataset (XGBoost
+    QuantileDMatrix reference, LightGBM Dataset subsets) instead of
+    re-sketching the features per fold. Thread use is coordinated: boosters
+    get all cores and folds run one after another, while single-threaded
+    sklearn GBR runs its folds in parallel threads.
+    """
+
+    def __init__(self, n_splits=5, n_jobs=None):
+        """
+        Initialize CV
+
+        Args:
+            n_splits: Number of folds
+            n_jobs: Total thread budget (default: all cores)
+        """
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+
+    def split(self, n_rows, time_values=None):
+        """
+        Generate rolling-origin folds
+
+        Args:
+            n_rows: Number of rows
+            time_values: Optional per-row timestamps; without them rows are
+                         assumed to be in time order already. With them, rows
+                         sharing a timestamp always land in the same block.
+
+        Returns:
+            List of (train_idx, test_idx) arrays
+        """
+        if time_values is None:
+            order = np.arange(n_rows)
+            block_of = np.arange(n_rows) * (self.n_splits + 1) // max(n_rows, 1)
+        else:
+            times = pd.to_datetime(pd.Series(time_values), errors='coerce').to_numpy()
+            order = np.argsort(times, kind='stable')
+            # Assign blocks by rank of unique timestamps so a day is never split
+            _, time_rank = np.unique(times[order], return_inverse=True)
+            n_times = time_rank.max() + 1 if n_rows else 1
+            block_of = time_rank * (self.n_splits + 1) // n_times
+
+        folds = []
+        for k in range(self.n_splits):
+            train_idx = order[block_of <= k]
+            test_idx = order[block_of == k + 1]
+            if len(train_idx) > 0 and len(test_idx) > 0:
+                folds.append((train_idx, test_idx))
+
+        return folds
+
+    def score(self, model_type, hyperparameters, X, y, time_values=None):
+        """
+        Cross-validated R² of a model configuration
+
+        Args:
+            model_type: 'xgboost', 'lightgbm' or 'sklearn'
+            hyperparameters: Model hyperparameters (sklearn-style names)
+            X: Feature DataFrame
+            y: Target Series
+            time_values: Optional per-row timestamps (see split)
+
+        Returns:
+            Array of per-fold R² scores
+        """
+        folds = self.split(len(X), time_values)
+        X_values = X.to_numpy(dtype=np.float32)
+        y_values = np.asarray(y, dtype=np.float32)
+
+        params = {k: v for k, v in hyperparameters.items() if k != 'n_estimators'}
+        n_rounds = hyperparameters.get('n_estimators', 200)
+
+        if model_type == 'xgboost' and HAS_XGBOOST:
+            # One quantile sketch over all rows; fold matrices reuse its bin cuts
+            reference = xgb.QuantileDMatrix(X_values, y_values, nthread=self.n_jobs)
+            booster_params = {**params, 'tree_method': 'hist', 'nthread': self.n_jobs, 'seed': 42}
+
+            scores = []
+            for train_idx, test_idx in folds:
+                train_matrix = xgb.QuantileDMatrix(
+                    X_values[train_idx], y_values[train_idx], ref=reference, nthread=self.n_jobs
+                )
+                booster = xgb.train(booster_params, train_matrix, num_boost_round=n_rounds)
+                y_pred = booster.predict(xgb.DMatrix(X_values[test_idx], nthread=self.n_jobs))
+                scores.append(r2_score(y_values[test_idx], y_pred))
+
+            return np.array(scores)
+
+        if model_type == 'lightgbm' and HAS_LIGHTGBM:
+            # Bin once; subsets share the parent's bin mappers
+            dataset = lgb.Dataset(
+                X_values, y_values, free_raw_data=False,
+                params={'verbose': -1, 'num_threads': self.n_jobs}
+            ).construct()
+            booster_params = {
+                **params, 'objective': 'regression', 'verbose': -1,
+                'num_threads': self.n_jobs, 'seed': 42
+            }
+
+            scores = []
+            for train_idx, test_idx in folds:
+                booster = lgb.train(booster_params, dataset.subset(train_idx), num_boost_round=n_rounds)
+                y_pred = booster.predict(X_values[test_idx], num_threads=self.n_jobs)
+                scores.append(r2_score(y_values[test_idx], y_pred))
+
+            return np.array(scores)
+
+        # sklearn GBR trains on one core, so parallelize across folds instead
+        def fit_fold(fold):
+            train_idx, test_idx = fold
+            model = GradientBoostingRegressor(**hyperparameters, random_state=42)
+            model.fit(X_values[train_idx], y_values[train_idx])
+            return r2_score(y_values[test_idx], model.predict(X_values[test_idx]))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(folds), self.n_jobs))) as executor:
+            return np.array(list(executor.map(fit_fold, folds)))
+
+
+class PredictionCache:
+    """
+    Content-addressed LRU cache of per-row predictions
+
+    Keys are (model version, 64-bit hash of the encoded feature row), so a
+    retrained or updated model never sees entries of its predecessor; those
+    simply age out of the LRU. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=100000):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached rows
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, model_version, row_hashes, require_confidence=True):
+        """
+        Look up cached rows
+
+        Args:
+            model_version: Version of the model asking
+            row_hashes: Array of row hashes
+            require_confidence: Treat entries cached without confidence as misses
+
+        Returns:
+            predictions: Array with cached predictions (NaN where missing)
+            confidence: Array with cached confidence (NaN where missing)
+            hit: Boolean mask of rows served from the cache
+        """
+        predictions = np.full(len(row_hashes), np.nan)
+        confidence = np.full(len(row_hashes), np.nan)
+        hit = np.zeros(len(row_hashes), dtype=bool)
+
+        with self._lock:
+            for i, row_hash in enumerate(row_hashes.tolist()):
+                entry = self._entries.get((model_version, row_hash))
+                if entry is None or (require_confidence and np.isnan(entry[1])):
+                    continue
+                self._entries.move_to_end((model_version, row_hash))
+                predictions[i], confidence[i] = entry
+                hit[i] = True
+
+            self.hits += int(hit.sum())
+            self.misses += int(len(hit) - hit.sum())
+
+        return predictions, confidence, hit
+
+    def store(self, model_version, row_hashes, predictions, confidence=None):
+        """Cache predictions (and confidence, if computed) for rows"""
+        if confidence is None:
+            confidence = np.full(len(predictions), np.nan)
+
+        with self._lock:
+            for row_hash, prediction, row_confidence in zip(
+                row_hashes.tolist(), predictions.tolist(), confidence.tolist()
+            ):
+                self._entries[(model_version, row_hash)] = (prediction, row_confidence)
+                self._entries.move_to_end((model_version, row_hash))
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Cache size and hit counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def new_model_version():
+    """Fresh model version identifier (timestamp plus random suffix)"""
+    return f"{datetime.now():%Y%m%d%H%M%S}-{os.urandom(4).hex()}"
+
+
 class ContainerGBRPredictor:
     """
     Gradient Boosting Regressor for container empty count prediction
@@ -75,15 +382,22 @@ class ContainerGBRPredictor:
         self.scaler = None
         self.is_trained = False
         self.training_metadata = {}
+        self.load_info = {}
+        self.time_values = None
+        self.prediction_cache = None
+        self._tree_table = None
 
         print(f"[INFO] Initialized {self.model_type.upper()} predictor")
 
-    def prepare_data(self, data_json):
+    def prepare_data(self, data_json, extend_vocabulary=False, fit_encoders=True):
         """
         Convert JSON data to pandas DataFrame with proper types
 
         Args:
-            data_json: Dictionary with 'features' and 'categorical_columns'
+            data_json: Dictionary with 'features', 'categorical_columns' and optional 'time_column'
+            extend_vocabulary: Add unseen categories to fitted encoders (incremental training)
+            fit_encoders: Fit encoders for categorical columns that have none; when
+                False such columns are an error (serving a trained model)
 
         Returns:
             X: Feature DataFrame
@@ -91,11 +405,20 @@ class ContainerGBRPredictor:
         """
         print(f"[INFO] Preparing data from {len(data_json['features'])} samples...")
 
-        df = pd.DataFrame(data_json['features'])
+        # Features are either row records (JSON input) or an already-columnar DataFrame
+        features = data_json['features']
+        df = features if isinstance(features, pd.DataFrame) else pd.DataFrame(features)
+
+        # Optional booking date column used only to order CV folds, never as a feature
+        time_column = data_json.get('time_column')
+        self.time_values = df[time_column].to_numpy() if time_column in df.columns else None
 
         # Store feature columns
-        self.feature_columns = [col for col in df.columns if col != 'target_empty_count']
-        self.categorical_columns = data_json.get('categorical_columns', [])
+        self.feature_columns = [
+            col for col in df.columns if col not in ('target_empty_count', time_column)
+        ]
+        # Inputs without a column list (e.g. NDJSON) keep the list of the loaded model
+        self.categorical_columns = data_json.get('categorical_columns', self.categorical_columns)
 
         print(f"   Total features: {len(self.feature_columns)}")
         print(f"   Categorical features: {len(self.categorical_columns)}")
@@ -104,33 +427,140 @@ class ContainerGBRPredictor:
         for col in self.categorical_columns:
             if col in df.columns:
                 if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    df[col] = self.label_encoders[col].fit_transform(df[col].astype(str))
+                    if not fit_encoders:
+                        raise ValueError(f"Model has no encoder for categorical column '{col}'")
+                    self.label_encoders[col] = CategoryEncoder()
+                    df[col] = self.label_encoders[col].fit_transform(df[col])
                 else:
-                    # Use existing encoder for prediction
-                    try:
-                        df[col] = self.label_encoders[col].transform(df[col].astype(str))
-                    except ValueError:
-                        # Handle unseen categories
-                        df[col] = self.label_encoders[col].transform(
-                            df[col].astype(str).apply(
-                                lambda x: x if x in self.label_encoders[col].classes_
-                                else self.label_encoders[col].classes_[0]
-                            )
-                        )
+                    # Use existing encoder for prediction; unseen categories get the unknown code
+                    encoder = self.label_encoders[col]
+                    if extend_vocabulary:
+                        n_added = encoder.extend(df[col])
+                        if n_added > 0:
+                            print(f"   Extended '{col}' vocabulary with {n_added} new categories")
+                    codes = encoder.transform(df[col])
+                    n_unknown = int((codes == encoder.unknown_code).sum())
+                    if n_unknown > 0:
+                        print(f"   [WARNING] {n_unknown} unseen '{col}' values mapped to unknown category")
+                    df[col] = codes
 
         # Separate features and target
-        X = df[self.feature_columns].copy()
         y = df['target_empty_count'] if 'target_empty_count' in df.columns else None
 
-        # Handle missing values
-        X = X.fillna(0)
+        # Handle missing values (fillna returns a new frame, so no extra copy is needed)
+        X = df[self.feature_columns].fillna(0)
 
         print(f"[OK] Data prepared: X shape {X.shape}, y shape {y.shape if y is not None else 'None'}")
 
         return X, y
 
-    def train(self, X, y, test_size=0.2, cv_folds=5):
+    def request_view(self):
+        """
+        Shallow copy for preparing one request's data
+
+        prepare_data() replaces the column lists and time values and may add
+        encoders; on the copy this leaves the shared predictor untouched. The
+        model, fitted encoders and prediction cache are shared.
+        """
+        view = copy.copy(self)
+        view.label_encoders = dict(self.label_encoders)
+        return view
+
+    DEFAULT_HYPERPARAMETERS = {
+        'xgboost': {
+            'n_estimators': 200,
+            'max_depth': 6,
+            'learning_rate': 0.05,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'min_child_weight': 3,
+            'gamma': 0.1,
+            'reg_alpha': 0.1,
+            'reg_lambda': 1.0,
+        },
+        'lightgbm': {
+            'n_estimators': 200,
+            'max_depth': 6,
+            'learning_rate': 0.05,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'min_child_samples': 20,
+            'reg_alpha': 0.1,
+            'reg_lambda': 1.0,
+        },
+        'sklearn': {
+            'n_estimators': 200,
+            'max_depth': 6,
+            'learning_rate': 0.05,
+            'subsample': 0.8,
+            'min_samples_split': 20,
+            'min_samples_leaf': 10,
+            'max_features': 'sqrt',
+        },
+    }
+
+    @property
+    def model_version(self):
+        """Identifier that changes whenever the model is retrained or updated"""
+        return self.training_metadata.get(
+            'model_version',
+            f"{self.model_type}-{self.training_metadata.get('train_date', 'unknown')}"
+        )
+
+    def _create_model(self, hyperparameters, n_jobs=-1):
+        """
+        Create an untrained model of this predictor's type
+
+        Args:
+            hyperparameters: Model hyperparameters (see DEFAULT_HYPERPARAMETERS)
+            n_jobs: Threads the booster may use (-1 for all cores)
+
+        Returns:
+            Unfitted sklearn-compatible regressor
+        """
+        if self.model_type == 'xgboost' and HAS_XGBOOST:
+            return xgb.XGBRegressor(
+                **hyperparameters,
+                random_state=42,
+                n_jobs=n_jobs,
+                tree_method='hist'
+            )
+
+        if self.model_type == 'lightgbm' and HAS_LIGHTGBM:
+            return lgb.LGBMRegressor(
+                **hyperparameters,
+                random_state=42,
+                n_jobs=n_jobs,
+                verbose=-1
+            )
+
+        # Requested library unavailable: fall back to scikit-learn GBR
+        if self.model_type != 'sklearn':
+            self.model_type = 'sklearn'
+            hyperparameters = self.DEFAULT_HYPERPARAMETERS['sklearn']
+
+        return GradientBoostingRegressor(**hyperparameters, random_state=42)
+
+    def _model_hyperparameters(self):
+        """
+        Hyperparameters of the current model, filled in from training metadata and defaults
+
+        Models loaded from native boosters don't carry their sklearn wrapper
+        parameters, so the values recorded at training time take precedence.
+        """
+        defaults = self.DEFAULT_HYPERPARAMETERS[self.model_type]
+        params = dict(defaults)
+
+        if hasattr(self.model, 'get_params'):
+            params.update({
+                k: v for k, v in self.model.get_params().items()
+                if k in defaults and v is not None
+            })
+
+        params.update(self.training_metadata.get('hyperparameters', {}))
+        return params
+
+    def train(self, X, y, test_size=0.2, cv_folds=5, hyperparameters=None, time_values=None):
         """
         Train GBR model with cross-validation
 
@@ -138,7 +568,9 @@ class ContainerGBRPredictor:
             X: Feature DataFrame
             y: Target Series
             test_size: Validation set size (default 0.2)
-            cv_folds: Number of cross-validation folds (default 5)
+            cv_folds: Number of rolling-origin cross-validation folds (default 5)
+            hyperparameters: Overrides for DEFAULT_HYPERPARAMETERS (e.g. from tuning)
+            time_values: Optional per-row booking dates for CV ordering (default: row order)
 
         Returns:
             Dictionary with training metrics
@@ -156,22 +588,10 @@ class ContainerGBRPredictor:
         print(f"   Validation set: {X_val.shape[0]} samples")
 
         # Initialize model based on type
-        if self.model_type == 'xgboost' and HAS_XGBOOST:
-            self.model = xgb.XGBRegressor(
-                n_estimators=200,
-                max_depth=6,
-                learning_rate=0.05,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                min_child_weight=3,
-                gamma=0.1,
-                reg_alpha=0.1,
-                reg_lambda=1.0,
-                random_state=42,
-                n_jobs=-1,
-                tree_method='hist'
-            )
+        hyperparameters = {**self.DEFAULT_HYPERPARAMETERS[self.model_type], **(hyperparameters or {})}
+        self.model = self._create_model(hyperparameters)
 
+        if self.model_type == 'xgboost':
             # Train (XGBoost 2.0+ uses callbacks)
             try:
                 # Try new API (XGBoost 2.0+)
@@ -186,21 +606,7 @@ class ContainerGBRPredictor:
                 # Fall back to old API or no early stopping
                 self.model.fit(X_train, y_train, verbose=False)
 
-        elif self.model_type == 'lightgbm' and HAS_LIGHTGBM:
-            self.model = lgb.LGBMRegressor(
-                n_estimators=200,
-                max_depth=6,
-                learning_rate=0.05,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                min_child_samples=20,
-                reg_alpha=0.1,
-                reg_lambda=1.0,
-                random_state=42,
-                n_jobs=-1,
-                verbose=-1
-            )
-
+        elif self.model_type == 'lightgbm':
             # Train with early stopping
             self.model.fit(
                 X_train, y_train,
@@ -209,17 +615,6 @@ class ContainerGBRPredictor:
             )
 
         else:  # sklearn GradientBoostingRegressor
-            self.model = GradientBoostingRegressor(
-                n_estimators=200,
-                max_depth=6,
-                learning_rate=0.05,
-                subsample=0.8,
-                min_samples_split=20,
-                min_samples_leaf=10,
-                max_features='sqrt',
-                random_state=42
-            )
-
             self.model.fit(X_train, y_train)
 
         # Evaluate on training and validation sets
@@ -241,28 +636,33 @@ class ContainerGBRPredictor:
         print(f"   Train RMSE: {train_rmse:.2f}")
         print(f"   Val RMSE:   {val_rmse:.2f}")
 
-        # Cross-validation (on smaller subset for speed)
-        if len(X_train) < 5000 and cv_folds > 0:
-            print(f"\n[CV] Running {cv_folds}-fold cross-validation...")
-            cv_scores = cross_val_score(
-                self.model, X_train, y_train,
-                cv=cv_folds, scoring='r2', n_jobs=-1
+        # Rolling-origin cross-validation over the full, time-ordered dataset
+        cv_scores = np.array([])
+        if cv_folds > 0:
+            print(f"\n[CV] Running {cv_folds}-fold rolling-origin cross-validation...")
+            cv_scores = RollingOriginCV(n_splits=cv_folds).score(
+                self.model_type, hyperparameters, X, y, time_values=time_values
             )
+
+        if len(cv_scores) > 0:
             cv_mean = cv_scores.mean()
             cv_std = cv_scores.std()
             print(f"   CV R² Score: {cv_mean:.4f} (+/- {cv_std:.4f})")
         else:
             cv_mean = val_r2
             cv_std = 0.0
-            print(f"\n[WARNING] Skipping CV (dataset too large or cv_folds=0)")
+            print(f"\n[WARNING] Skipping CV (cv_folds=0 or too few rows)")
 
         # Store training metadata
         self.training_metadata = {
             'model_type': self.model_type,
             'train_samples': len(X_train),
             'val_samples': len(X_val),
+            'rows_seen': len(X),
             'n_features': X.shape[1],
             'train_date': datetime.now().isoformat(),
+            'model_version': new_model_version(),
+            'hyperparameters': self._model_hyperparameters(),
             'metrics': {
                 'train_r2': float(train_r2),
                 'val_r2': float(val_r2),
@@ -276,6 +676,7 @@ class ContainerGBRPredictor:
         }
 
         self.is_trained = True
+        self._tree_table = None
         print(f"\n[OK] Training completed successfully!")
 
         return {
@@ -288,10 +689,98 @@ class ContainerGBRPredictor:
             'feature_importance': self.get_feature_importance()
         }
 
+    def update(self, X, y, rounds=50, new_rows_only=False):
+        """
+        Continue boosting the trained model on rows added since the last training
+
+        The input is normally the full, date-sorted history; rows beyond the
+        number already seen (training_metadata['rows_seen']) are treated as
+        new. Existing trees are kept and 'rounds' trees are added, fitted on
+        the new rows only (XGBoost xgb_model=, LightGBM init_model=, sklearn
+        warm_start), so the cost scales with the delta. Prepare X with
+        prepare_data(..., extend_vocabulary=True) so new categories get fresh
+        codes without remapping existing ones.
+
+        Args:
+            X: Feature DataFrame
+            y: Target Series
+            rounds: Number of boosting rounds to add
+            new_rows_only: X contains only new rows (skip the rows_seen offset)
+
+        Returns:
+            Dictionary with update metrics
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained yet. Call train() first.")
+
+        rows_seen = self.training_metadata.get('rows_seen', 0)
+        if new_rows_only:
+            X_new, y_new = X, y
+        else:
+            X_new, y_new = X.iloc[rows_seen:], y.iloc[rows_seen:]
+
+        if len(X_new) == 0:
+            print("[INFO] No new rows since last training, model unchanged")
+            return {'new_samples': 0, 'rounds_added': 0}
+
+        print(f"[TRAINING] Incremental {self.model_type.upper()} update...")
+        print(f"   New samples: {len(X_new)}")
+        print(f"   Rounds to add: {rounds}")
+
+        # The previous model has never seen these rows, so this is an honest holdout score
+        y_before = self.model.predict(X_new)
+
+        hyperparameters = self._model_hyperparameters()
+        previous = self.model
+
+        if self.model_type == 'xgboost':
+            self.model = self._create_model({**hyperparameters, 'n_estimators': rounds})
+            self.model.fit(X_new, y_new, xgb_model=previous.get_booster(), verbose=False)
+        elif self.model_type == 'lightgbm':
+            self.model = self._create_model({**hyperparameters, 'n_estimators': rounds})
+            self.model.fit(X_new, y_new, init_model=previous.booster_)
+        else:
+            self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + rounds)
+            self.model.fit(X_new, y_new)
+
+        y_after = self.model.predict(X_new)
+
+        metrics = {
+            'new_samples': len(X_new),
+            'rounds_added': rounds,
+            'new_r2_before': float(r2_score(y_new, y_before)) if len(X_new) > 1 else None,
+            'new_r2_after': float(r2_score(y_new, y_after)) if len(X_new) > 1 else None,
+            'new_mae_before': float(mean_absolute_error(y_new, y_before)),
+            'new_mae_after': float(mean_absolute_error(y_new, y_after))
+        }
+
+        print(f"   New-row MAE: {metrics['new_mae_before']:.2f} -> {metrics['new_mae_after']:.2f}")
+
+        self.training_metadata.update({
+            'rows_seen': rows_seen + len(X_new),
+            'n_features': X.shape[1],
+            'train_date': datetime.now().isoformat(),
+            'model_version': new_model_version(),
+            'hyperparameters': hyperparameters,
+        })
+        self.training_metadata.setdefault('updates', []).append({
+            'date': self.training_metadata['train_date'],
+            **metrics
+        })
+
+        self._tree_table = None
+        print(f"[OK] Incremental update completed")
+
+        return metrics
+
     def predict(self, X, return_confidence=True):
         """
         Generate predictions with optional confidence scores
 
+        With a prediction_cache attached, rows already predicted by this model
+        version are served from the cache and only the remaining rows are
+        passed to the booster.
+
         Args:
             X: Feature DataFrame
             return_confidence: Whether to calculate confidence scores
@@ -303,8 +792,38 @@ class ContainerGBRPredictor:
         if not self.is_trained:
             raise ValueError("Model not trained yet. Call train() first.")
 
-        print(f"[PREDICT] Generating predictions for {len(X)} samples...")
+        if self.prediction_cache is None:
+            print(f"[PREDICT] Generating predictions for {len(X)} samples...")
+            predictions, confidence = self._predict_uncached(X, return_confidence)
+        else:
+            # Content address: 64-bit hash of each encoded feature row
+            row_hashes = pd.util.hash_pandas_object(X, index=False).to_numpy()
+            predictions, confidence, hit = self.prediction_cache.lookup(
+                self.model_version, row_hashes, require_confidence=return_confidence
+            )
+            miss = ~hit
+
+            print(f"[PREDICT] Generating predictions for {int(miss.sum())} samples ({int(hit.sum())} cached)...")
+
+            if miss.any():
+                miss_predictions, miss_confidence = self._predict_uncached(X[miss], return_confidence)
+                predictions[miss] = miss_predictions
+                if miss_confidence is not None:
+                    confidence[miss] = miss_confidence
+                self.prediction_cache.store(
+                    self.model_version, row_hashes[miss], miss_predictions, miss_confidence
+                )
+
+            if not return_confidence:
+                confidence = None
 
+        if confidence is not None and len(predictions) > 0:
+            print(f"[OK] Predictions generated (mean: {predictions.mean():.2f}, confidence: {confidence.mean():.2f})")
+
+        return predictions, confidence
+
+    def _predict_uncached(self, X, return_confidence):
+        """Run the booster (and confidence engine) on X"""
         predictions = self.model.predict(X)
 
         # Ensure non-negative predictions
@@ -316,48 +835,46 @@ class ContainerGBRPredictor:
         # Calculate confidence based on prediction consistency
         confidence = self._calculate_confidence(X, predictions)
 
-        print(f"[OK] Predictions generated (mean: {predictions.mean():.2f}, confidence: {confidence.mean():.2f})")
-
         return predictions, confidence
 
+    def predict_chunks(self, chunks, return_confidence=True):
+        """
+        Generate predictions chunk by chunk so memory stays bounded by the chunk size
+
+        Args:
+            chunks: Iterable of input dictionaries (see iter_input_chunks)
+            return_confidence: Whether to calculate confidence scores
+
+        Yields:
+            offset: Row offset of the chunk in the full input
+            predictions: Predicted values for the chunk
+            confidence: Confidence scores for the chunk (or None)
+        """
+        offset = 0
+
+        for chunk in chunks:
+            X, _ = self.prepare_data(chunk)
+            predictions, confidence = self.predict(X, return_confidence=return_confidence)
+
+            yield offset, predictions, confidence
+            offset += len(predictions)
+
     def _calculate_confidence(self, X, predictions):
         """
         Calculate confidence scores based on model uncertainty
 
-        For tree-based models, we measure variance across trees
+        For tree-based models, we measure variance across trees. Per-tree outputs
+        come from a single leaf-index pass plus a leaf-value lookup table, so the
+        cost is one traversal of the ensemble regardless of the number of trees.
         """
         confidence = np.ones(len(predictions))
 
         try:
-            if self.model_type == 'xgboost' and HAS_XGBOOST:
-                # Get predictions from individual trees
-                n_trees = min(50, self.model.n_estimators)
-                tree_preds = []
-
-                for i in range(n_trees):
-                    try:
-                        pred = self.model.predict(X, iteration_range=(i, i + 1))
-                        tree_preds.append(pred)
-                    except:
-                        break
-
-                if len(tree_preds) > 0:
-                    tree_preds = np.array(tree_preds)
-                    tree_std = tree_preds.std(axis=0)
-                    tree_mean = tree_preds.mean(axis=0)
-
-                    # Confidence = 1 - (normalized standard deviation)
-                    confidence = 1 - np.clip(tree_std / (tree_mean + 1), 0, 0.7)
-                    confidence = np.clip(confidence, 0.3, 0.95)
-
-            elif self.model_type == 'sklearn':
-                # For sklearn GBR, use prediction magnitude as proxy
-                # Higher predictions = lower confidence (more uncertainty)
-                confidence = np.clip(1 - (predictions / 100), 0.3, 0.95)
+            tree_std, tree_mean = self._tree_spread(X)
 
-            else:
-                # Default confidence based on prediction magnitude
-                confidence = np.clip(1 - (predictions / 100), 0.3, 0.95)
+            # Confidence = 1 - (normalized standard deviation)
+            confidence = 1 - np.clip(tree_std / (tree_mean + 1), 0, 0.7)
+            confidence = np.clip(confidence, 0.3, 0.95)
 
         except Exception as e:
             print(f"[WARNING]  Confidence calculation failed: {e}")
@@ -366,6 +883,127 @@ class ContainerGBRPredictor:
 
         return confidence
 
+    def _tree_spread(self, X, chunk_size=50000):
+        """
+        Standard deviation and mean of the individual tree predictions per row
+
+        A tree's prediction is the model's base score plus that tree's leaf value,
+        matching XGBoost's predict(iteration_range=(i, i + 1)).
+
+        Args:
+            X: Feature DataFrame
+            chunk_size: Rows per lookup chunk (bounds the rows x trees buffer)
+
+        Returns:
+            tree_std: Per-row standard deviation across trees
+            tree_mean: Per-row mean of tree predictions
+        """
+        if self._tree_table is None:
+            self._tree_table = self._build_tree_table()
+
+        leaf_values, base_score = self._tree_table
+        n_trees = leaf_values.shape[0]
+        tree_index = np.arange(n_trees)
+
+        tree_std = np.empty(len(X))
+        tree_mean = np.empty(len(X))
+
+        for start in range(0, len(X), chunk_size):
+            X_chunk = X.iloc[start:start + chunk_size]
+            leaves = self._predict_leaves(X_chunk, n_trees)
+
+            # contributions[i, t] = output of tree t for row i
+            contributions = leaf_values[tree_index, leaves]
+            base = base_score(X_chunk) if callable(base_score) else base_score
+
+            tree_std[start:start + chunk_size] = contributions.std(axis=1)
+            tree_mean[start:start + chunk_size] = base + contributions.mean(axis=1)
+
+        return tree_std, tree_mean
+
+    def _predict_leaves(self, X, n_trees):
+        """Leaf index reached in each of the first n_trees trees, shape (rows, n_trees)"""
+        if self.model_type == 'xgboost':
+            leaves = self.model.get_booster().predict(
+                xgb.DMatrix(X), pred_leaf=True, iteration_range=(0, n_trees)
+            )
+        elif self.model_type == 'lightgbm':
+            leaves = self.model.booster_.predict(X, pred_leaf=True, num_iteration=n_trees)
+        else:
+            leaves = self.model.apply(X)
+
+        return np.asarray(leaves).reshape(len(X), n_trees).astype(np.intp)
+
+    def _build_tree_table(self):
+        """
+        Build the per-tree leaf value lookup table for the trained model
+
+        Returns:
+            leaf_values: Array (n_trees, max_leaf_id + 1); leaf_values[t, leaf] is
+                         the shrunk output of that leaf in tree t
+            base_score: Scalar baseline, or callable X -> per-row baseline
+        """
+        if self.model_type == 'xgboost':
+            booster = self.model.get_booster()
+            best_iteration = getattr(self.model, 'best_iteration', None)
+            n_trees = best_iteration + 1 if best_iteration is not None else booster.num_boosted_rounds()
+
+            trees = booster.trees_to_dataframe()
+            leaves = trees[(trees['Feature'] == 'Leaf') & (trees['Tree'] < n_trees)]
+
+            leaf_values = np.zeros((n_trees, int(trees['Node'].max()) + 1))
+            leaf_values[leaves['Tree'].to_numpy(), leaves['Node'].to_numpy()] = leaves['Gain'].to_numpy()
+
+            config = json.loads(booster.save_config())
+            base_score = float(str(config['learner']['learner_model_param']['base_score']).strip('[]'))
+
+            return leaf_values, base_score
+
+        if self.model_type == 'lightgbm':
+            booster = self.model.booster_
+            best_iteration = getattr(self.model, 'best_iteration_', None)
+            tree_info = booster.dump_model()['tree_info']
+            n_trees = best_iteration if best_iteration else len(tree_info)
+
+            leaf_values = np.zeros((n_trees, max(t['num_leaves'] for t in tree_info[:n_trees])))
+            leaf_counts = np.zeros_like(leaf_values)
+
+            for t, info in enumerate(tree_info[:n_trees]):
+                stack = [info['tree_structure']]
+                while stack:
+                    node = stack.pop()
+                    if 'leaf_value' in node:
+                        leaf = node.get('leaf_index', 0)
+                        leaf_values[t, leaf] = node['leaf_value']
+                        leaf_counts[t, leaf] = node.get('leaf_count', 0)
+                    else:
+                        stack.extend([node['left_child'], node['right_child']])
+
+            # LightGBM folds the boost-from-average init score into the first tree;
+            # recover it as the sample-weighted mean leaf value and treat it as the base
+            base_score = 0.0
+            if leaf_counts[0].sum() > 0:
+                base_score = float(np.average(leaf_values[0], weights=leaf_counts[0]))
+                leaf_values[0] -= base_score
+
+            return leaf_values, base_score
+
+        # sklearn GradientBoostingRegressor
+        estimators = self.model.estimators_[:, 0]
+        leaf_values = np.zeros((len(estimators), max(e.tree_.node_count for e in estimators)))
+
+        for t, estimator in enumerate(estimators):
+            values = estimator.tree_.value.reshape(estimator.tree_.node_count)
+            leaf_values[t, :len(values)] = values * self.model.learning_rate
+
+        init = self.model.init_
+        if hasattr(init, 'predict'):
+            base_score = lambda X: init.predict(X).reshape(len(X))
+        else:
+            base_score = 0.0
+
+        return leaf_values, base_score
+
     def get_feature_importance(self, top_n=15):
         """
         Get feature importance scores
@@ -394,81 +1032,1056 @@ class ContainerGBRPredictor:
 
         return feature_importance
 
-    def save(self, path='models/gbr_model.pkl'):
+    def save(self, path='models/gbr_model.pkl', native=True):
         """
         Save model to disk
 
         Args:
             path: File path to save model
+            native: Also export the fast-loading native artifacts (see export_native)
         """
         if not self.is_trained:
             raise ValueError("Cannot save untrained model")
 
         # Create directory if needed
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
 
         model_data = {
             'model': self.model,
             'model_type': self.model_type,
             'feature_columns': self.feature_columns,
             'categorical_columns': self.categorical_columns,
-            'label_encoders': self.label_encoders,
+            # Store vocabularies as plain lists so the pickle doesn't reference this script's classes
+            'label_encoders': {
+                col: encoder.classes_.tolist() for col, encoder in self.label_encoders.items()
+            },
             'scaler': self.scaler,
             'is_trained': self.is_trained,
             'training_metadata': self.training_metadata
         }
 
-        joblib.dump(model_data, path, compress=3)
+        # Write to a temp file and rename so serving processes never see a partial model
+        tmp_path = f"{path}.tmp"
+        joblib.dump(model_data, tmp_path, compress=3)
+        os.replace(tmp_path, path)
         # Use ASCII-safe output to avoid Unicode encoding issues on Windows
         try:
             print(f"[OK] Model saved to {path}")
         except UnicodeEncodeError:
             print(f"[OK] Model saved successfully")
 
+        if native:
+            self.export_native(path)
+
+    def export_native(self, path='models/gbr_model.pkl'):
+        """
+        Export fast-loading native artifacts next to a saved model
+
+        Writes <name>.native/ containing the booster in its native format
+        (XGBoost UBJSON, LightGBM text, or an uncompressed mmap-able joblib file
+        for sklearn), the encoder vocabularies as JSON and a plain JSON
+        metadata file. The metadata records the pickle's modification time, so
+        load() ignores the artifacts once the pickle is rewritten without them.
+
+        Args:
+            path: Path of the saved pickle the artifacts belong to
+        """
+        if self.scaler is not None:
+            print("[WARNING]  Native export does not support scalers, skipping")
+            return
+
+        native_dir = native_model_dir(path)
+        os.makedirs(native_dir, exist_ok=True)
+
+        # Unique file names so a concurrent loader never reads a half-replaced booster
+        token = f"{datetime.now():%Y%m%d%H%M%S}-{os.urandom(4).hex()}"
+
+        if self.model_type == 'xgboost':
+            booster_file = f"booster-{token}.ubj"
+            self.model.save_model(os.path.join(native_dir, booster_file))
+        elif self.model_type == 'lightgbm':
+            booster_file = f"booster-{token}.txt"
+            best_iteration = getattr(self.model, 'best_iteration_', None)
+            self.model.booster_.save_model(
+                os.path.join(native_dir, booster_file), num_iteration=best_iteration or None
+            )
+        else:
+            booster_file = f"model-{token}.joblib"
+            joblib.dump(self.model, os.path.join(native_dir, booster_file))
+
+        encoders_file = f"encoders-{token}.json"
+        write_json_atomic(os.path.join(native_dir, encoders_file), {
+            col: encoder.classes_.tolist() for col, encoder in self.label_encoders.items()
+        })
+
+        write_json_atomic(os.path.join(native_dir, 'metadata.json'), {
+            'format_version': 1,
+            'model_type': self.model_type,
+            'booster_file': booster_file,
+            'encoders_file': encoders_file,
+            'feature_columns': self.feature_columns,
+            'categorical_columns': self.categorical_columns,
+            'training_metadata': self.training_metadata,
+            'source_mtime_ns': os.stat(path).st_mtime_ns
+        })
+
+        # Remove artifacts of previous exports
+        for name in os.listdir(native_dir):
+            if name not in ('metadata.json', booster_file, encoders_file):
+                try:
+                    os.remove(os.path.join(native_dir, name))
+                except OSError:
+                    pass
+
+        print(f"[OK] Native model artifacts exported to {native_dir}")
+
     def load(self, path='models/gbr_model.pkl'):
         """
         Load model from disk
 
+        Uses the native artifacts written by export_native() when they are
+        present and current, otherwise unpickles the model file.
+
         Args:
             path: File path to load model from
         """
         if not os.path.exists(path):
             raise FileNotFoundError(f"Model file not found: {path}")
 
+        start = time.perf_counter()
+
+        try:
+            loaded_native = self._load_native(path)
+        except Exception as e:
+            print(f"[WARNING]  Native model load failed, falling back to pickle: {e}")
+            loaded_native = False
+
+        if not loaded_native:
+            self._load_pickle(path)
+
+        self._tree_table = None
+        self.load_info = {
+            'format': 'native' if loaded_native else 'pickle',
+            'load_seconds': round(time.perf_counter() - start, 4)
+        }
+
+        print(f"[OK] Model loaded from {path} ({self.load_info['format']}, {self.load_info['load_seconds']:.3f}s)")
+        print(f"   Model type: {self.model_type}")
+        print(f"   Features: {len(self.feature_columns)}")
+        print(f"   Trained: {self.training_metadata.get('train_date', 'Unknown')}")
+
+    def _load_pickle(self, path):
+        """Load model from the joblib pickle"""
         model_data = joblib.load(path)
 
         self.model = model_data['model']
         self.model_type = model_data['model_type']
         self.feature_columns = model_data['feature_columns']
         self.categorical_columns = model_data['categorical_columns']
-        self.label_encoders = model_data['label_encoders']
+        # Vocabularies are stored as lists; older models pickled sklearn LabelEncoders
+        self.label_encoders = {
+            col: CategoryEncoder(encoder) if isinstance(encoder, list)
+            else CategoryEncoder.from_label_encoder(encoder)
+            for col, encoder in model_data['label_encoders'].items()
+        }
         self.scaler = model_data.get('scaler')
         self.is_trained = model_data['is_trained']
         self.training_metadata = model_data.get('training_metadata', {})
 
-        print(f"[OK] Model loaded from {path}")
-        print(f"   Model type: {self.model_type}")
-        print(f"   Features: {len(self.feature_columns)}")
-        print(f"   Trained: {self.training_metadata.get('train_date', 'Unknown')}")
+    def _load_native(self, path):
+        """
+        Load model from native artifacts
+
+        Returns:
+            True if the native artifacts were current and loaded, False otherwise
+        """
+        metadata_file = os.path.join(native_model_dir(path), 'metadata.json')
+        if not os.path.exists(metadata_file):
+            return False
+
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+        if metadata.get('source_mtime_ns') != os.stat(path).st_mtime_ns:
+            print("[INFO] Native model artifacts are out of date, loading pickle")
+            return False
+
+        model_type = metadata['model_type']
+        booster_path = os.path.join(native_model_dir(path), metadata['booster_file'])
+
+        if model_type == 'xgboost':
+            if not HAS_XGBOOST:
+                return False
+            model = xgb.XGBRegressor()
+            model.load_model(booster_path)
+        elif model_type == 'lightgbm':
+            if not HAS_LIGHTGBM:
+                return False
+            model = LightGBMBoosterModel(lgb.Booster(model_file=booster_path))
+        else:
+            # Uncompressed joblib file: tree arrays are memory-mapped instead of copied
+            model = joblib.load(booster_path, mmap_mode='r')
+
+        with open(os.path.join(native_model_dir(path), metadata['encoders_file']), 'r', encoding='utf-8') as f:
+            vocabularies = json.load(f)
+
+        self.model = model
+        self.model_type = model_type
+        self.feature_columns = metadata['feature_columns']
+        self.categorical_columns = metadata['categorical_columns']
+        self.label_encoders = {col: CategoryEncoder(classes) for col, classes in vocabularies.items()}
+        self.scaler = None
+        self.is_trained = True
+        self.training_metadata = metadata.get('training_metadata', {})
+
+        return True
+
+
+class LightGBMBoosterModel:
+    """
+    Minimal LGBMRegressor stand-in around a native lightgbm.Booster
+
+    Native LightGBM model files hold a Booster, not the sklearn wrapper. This
+    exposes the parts of the wrapper the predictor uses.
+    """
+
+    def __init__(self, booster):
+        self.booster_ = booster
+        # Exported boosters only contain the trees up to the best iteration
+        self.best_iteration_ = None
+        self.n_estimators = booster.num_trees()
+
+    @property
+    def feature_importances_(self):
+        return self.booster_.feature_importance(importance_type='split')
+
+    def predict(self, X):
+        return self.booster_.predict(X)
+
+
+def native_model_dir(path):
+    """Directory holding the native artifacts of a model file"""
+    return f"{os.path.splitext(path)[0]}.native"
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+# Worker state for HyperparameterSearch, set once per process by _search_worker_init
+_SEARCH_STATE = {}
+
+
+def _search_worker_init(x_name, y_name, shape, n_train, n_jobs):
+    """Attach a search worker to the shared feature matrix and target"""
+    # Progress output of workers must not mix with the JSON result on stdout
+    sys.stdout = sys.stderr
+    warnings.filterwarnings('ignore')
+
+    x_shm = shared_memory.SharedMemory(name=x_name)
+    y_shm = shared_memory.SharedMemory(name=y_name)
+    X = np.ndarray(shape, dtype=np.float64, buffer=x_shm.buf)
+    y = np.ndarray((shape[0],), dtype=np.float64, buffer=y_shm.buf)
+
+    _SEARCH_STATE.update({
+        'shm': (x_shm, y_shm),
+        'X_train': X[:n_train], 'y_train': y[:n_train],
+        'X_val': X[n_train:], 'y_val': y[n_train:],
+        'n_jobs': n_jobs
+    })
+
+
+def _search_evaluate(model_type, hyperparameters):
+    """Fit one configuration on the shared training rows and score it on the validation rows"""
+    start = time.perf_counter()
+
+    predictor = ContainerGBRPredictor(model_type=model_type)
+    model = predictor._create_model(hyperparameters, n_jobs=_SEARCH_STATE['n_jobs'])
+    model.fit(_SEARCH_STATE['X_train'], _SEARCH_STATE['y_train'])
+
+    y_pred = model.predict(_SEARCH_STATE['X_val'])
+
+    return {
+        'val_rmse': float(np.sqrt(mean_squared_error(_SEARCH_STATE['y_val'], y_pred))),
+        'val_mae': float(mean_absolute_error(_SEARCH_STATE['y_val'], y_pred)),
+        'fit_seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+class HyperparameterSearch:
+    """
+    Parallel successive-halving hyperparameter search
+
+    Random configurations are sampled across the available model types and
+    trained with a small number of boosting rounds. After each rung only the
+    best 1/eta configurations continue, with eta times more rounds. Fits run
+    in a process pool whose workers share one copy of the feature matrix via
+    shared memory, and the whole search stops at a wall-clock budget.
+    """
+
+    SEARCH_SPACES = {
+        'xgboost': {
+            'max_depth': ('int', 3, 10),
+            'learning_rate': ('log', 0.01, 0.3),
+            'subsample': ('float', 0.6, 1.0),
+            'colsample_bytree': ('float', 0.5, 1.0),
+            'min_child_weight': ('int', 1, 10),
+            'gamma': ('float', 0.0, 0.5),
+            'reg_alpha': ('log', 0.001, 1.0),
+            'reg_lambda': ('log', 0.1, 10.0),
+        },
+        'lightgbm': {
+            'max_depth': ('int', 3, 10),
+            'learning_rate': ('log', 0.01, 0.3),
+            'colsample_bytree': ('float', 0.5, 1.0),
+            'min_child_samples': ('int', 5, 50),
+            'reg_alpha': ('log', 0.001, 1.0),
+            'reg_lambda': ('log', 0.1, 10.0),
+        },
+        'sklearn': {
+            'max_depth': ('int', 2, 8),
+            'learning_rate': ('log', 0.01, 0.3),
+            'subsample': ('float', 0.6, 1.0),
+            'min_samples_split': ('int', 2, 50),
+            'min_samples_leaf': ('int', 1, 30),
+            'max_features': ('choice', ['sqrt', 'log2', None]),
+        },
+    }
+
+    def __init__(self, model_types=None, n_configs=27, min_rounds=50, max_rounds=400, eta=3,
+                 budget_seconds=300, workers=None, test_size=0.2, random_state=42):
+        """
+        Initialize search
+
+        Args:
+            model_types: Model types to search (default: all available)
+            n_configs: Number of configurations sampled for the first rung
+            min_rounds: Boosting rounds at the first rung
+            max_rounds: Maximum boosting rounds
+            eta: Halving rate (keep 1/eta configurations per rung)
+            budget_seconds: Wall-clock budget for the whole search
+            workers: Worker processes (default: half the CPU cores)
+            test_size: Validation fraction used for scoring
+            random_state: Seed for sampling and the validation split
+        """
+        if model_types is None:
+            model_types = [t for t, available in
+                           (('xgboost', HAS_XGBOOST), ('lightgbm', HAS_LIGHTGBM), ('sklearn', True))
+                           if available]
+
+        self.model_types = model_types
+        self.n_configs = n_configs
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.budget_seconds = budget_seconds
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.test_size = test_size
+        self.rng = np.random.default_rng(random_state)
+        self.random_state = random_state
+
+    def sample_config(self, model_type):
+        """Sample one configuration from a model type's search space"""
+        config = {}
+
+        for name, spec in self.SEARCH_SPACES[model_type].items():
+            kind = spec[0]
+            if kind == 'int':
+                config[name] = int(self.rng.integers(spec[1], spec[2] + 1))
+            elif kind == 'float':
+                config[name] = float(self.rng.uniform(spec[1], spec[2]))
+            elif kind == 'log':
+                config[name] = float(np.exp(self.rng.uniform(np.log(spec[1]), np.log(spec[2]))))
+            else:
+                config[name] = spec[1][int(self.rng.integers(len(spec[1])))]
+
+        return {**ContainerGBRPredictor.DEFAULT_HYPERPARAMETERS[model_type], **config}
+
+    def run(self, X, y):
+        """
+        Run the search
+
+        Args:
+            X: Encoded feature DataFrame (see prepare_data)
+            y: Target Series
+
+        Returns:
+            Dictionary with the best 'model_type', 'hyperparameters' and 'score',
+            plus per-rung search statistics
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget_seconds
+
+        # Same shuffled split as train(); train rows first so workers can slice views
+        train_idx, val_idx = train_test_split(
+            np.arange(len(X)), test_size=self.test_size, random_state=self.random_state, shuffle=True
+        )
+        order = np.concatenate([train_idx, val_idx])
+
+        X_values = np.ascontiguousarray(X.to_numpy(dtype=np.float64)[order])
+        y_values = np.ascontiguousarray(np.asarray(y, dtype=np.float64)[order])
+
+        x_shm = shared_memory.SharedMemory(create=True, size=max(X_values.nbytes, 1))
+        y_shm = shared_memory.SharedMemory(create=True, size=max(y_values.nbytes, 1))
+        np.ndarray(X_values.shape, dtype=np.float64, buffer=x_shm.buf)[:] = X_values
+        np.ndarray(y_values.shape, dtype=np.float64, buffer=y_shm.buf)[:] = y_values
+        del X_values, y_values
+
+        # Split cores between workers so boosters don't oversubscribe
+        n_jobs = max(1, (os.cpu_count() or 1) // self.workers)
+
+        # Spread the sampled configurations evenly over the model types
+        candidates = []
+        for i in range(self.n_configs):
+            model_type = self.model_types[i % len(self.model_types)]
+            candidates.append((model_type, self.sample_config(model_type)))
+
+        print(f"[TUNING] Successive halving over {len(candidates)} configurations "
+              f"({', '.join(self.model_types)}), {self.workers} workers, budget {self.budget_seconds}s")
+
+        rungs = []
+        best = None
+        rounds = self.min_rounds
+
+        pool = multiprocessing.Pool(
+            self.workers, initializer=_search_worker_init,
+            initargs=(x_shm.name, y_shm.name, X.shape, len(train_idx), n_jobs)
+        )
+
+        try:
+            while candidates:
+                pending = [
+                    (model_type, config, pool.apply_async(
+                        _search_evaluate, (model_type, {**config, 'n_estimators': rounds})
+                    ))
+                    for model_type, config in candidates
+                ]
+
+                while time.perf_counter() < deadline and not all(r.ready() for _, _, r in pending):
+                    time.sleep(0.05)
+
+                results = []
+                for model_type, config, result in pending:
+                    if result.ready() and result.successful():
+                        results.append((result.get()['val_rmse'], model_type, config, result.get()))
+
+                results.sort(key=lambda r: r[0])
+                rungs.append({
+                    'n_estimators': rounds,
+                    'submitted': len(pending),
+                    'completed': len(results),
+                    'best_val_rmse': results[0][0] if results else None
+                })
+                print(f"   Rung {len(rungs)}: {len(results)}/{len(pending)} configs at {rounds} rounds"
+                      + (f", best RMSE {results[0][0]:.4f}" if results else ""))
+
+                # Keep the best score seen at any rung, not just the last one reached
+                if results and (best is None or results[0][0] < best['score']['val_rmse']):
+                    _, model_type, config, score = results[0]
+                    best = {
+                        'model_type': model_type,
+                        'hyperparameters': {**config, 'n_estimators': rounds},
+                        'score': score
+                    }
+
+                if time.perf_counter() >= deadline or len(results) <= 1 or rounds >= self.max_rounds:
+                    break
+
+                keep = max(1, len(results) // self.eta)
+                candidates = [(model_type, config) for _, model_type, config, _ in results[:keep]]
+                rounds = min(rounds * self.eta, self.max_rounds)
+        finally:
+            # Terminate rather than join so unfinished fits can't overrun the budget
+            pool.terminate()
+            pool.join()
+            x_shm.close()
+            x_shm.unlink()
+            y_shm.close()
+            y_shm.unlink()
+
+        if best is None:
+            raise RuntimeError(f"No configuration finished within the {self.budget_seconds}s budget")
+
+        best['search'] = {
+            'strategy': 'successive_halving',
+            'model_types': self.model_types,
+            'n_configs': self.n_configs,
+            'eta': self.eta,
+            'workers': self.workers,
+            'budget_seconds': self.budget_seconds,
+            'elapsed_seconds': round(time.perf_counter() - start, 3),
+            'rungs': rungs
+        }
+        best['tuned_date'] = datetime.now().isoformat()
+
+        print(f"[OK] Best: {best['model_type'].upper()} with val RMSE {best['score']['val_rmse']:.4f}")
+
+        return best
+
+
+def tuned_config_path(path):
+    """File holding the tuned hyperparameters of a model file"""
+    return f"{os.path.splitext(path)[0]}.hyperparameters.json"
+
+
+class GBRPredictionServer:
+    """
+    Long-lived prediction server that keeps a loaded model in memory
+
+    Requests and responses are newline-delimited JSON objects. Every request
+    may carry an 'id' that is echoed back, so clients can pipeline several
+    requests on one stream and match responses that complete out of order.
+    The model file is polled for changes and hot-reloaded without dropping
+    in-flight requests.
+    """
+
+    def __init__(self, model_path='models/gbr_model.pkl', workers=4, reload_interval=2.0, cache_size=100000):
+        """
+        Initialize prediction server
+
+        Args:
+            model_path: Path of the model file to serve (and watch for changes)
+            workers: Number of requests processed concurrently
+            reload_interval: Seconds between model file checks (0 disables hot reload)
+            cache_size: Rows kept in the prediction cache (0 disables caching)
+        """
+        self.model_path = model_path
+        self.workers = workers
+        self.reload_interval = reload_interval
+        self.cache = PredictionCache(cache_size) if cache_size > 0 else None
+        self.predictor = None
+        self.model_mtime = None
+        self.stats = {
+            'started': datetime.now().isoformat(),
+            'requests': 0,
+            'errors': 0,
+            'reloads': 0
+        }
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._reload_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def load_model(self):
+        """Load model from disk and swap it in for subsequent requests"""
+        with self._reload_lock:
+            mtime = os.path.getmtime(self.model_path)
+            predictor = ContainerGBRPredictor(model_type='auto')
+            predictor.load(self.model_path)
+            predictor.prediction_cache = self.cache
+
+            # Requests already running keep their reference to the old predictor
+            reloaded = self.predictor is not None
+            self.predictor = predictor
+            self.model_mtime = mtime
+
+            # Entries are keyed by model version, so this only frees memory early
+            if reloaded and self.cache is not None:
+                self.cache.invalidate()
+
+        if reloaded:
+            with self._stats_lock:
+                self.stats['reloads'] += 1
+            print(f"[OK] Model hot-reloaded from {self.model_path}")
+
+    def _watch_model(self):
+        """Poll the model file and reload it when it changes"""
+        while not self._stop.wait(self.reload_interval):
+            try:
+                mtime = os.path.getmtime(self.model_path)
+            except OSError:
+                continue
+
+            if mtime == self.model_mtime:
+                continue
+
+            try:
+                self.load_model()
+            except Exception as e:
+                # File may still be in the middle of being written; retry next poll
+                print(f"[WARNING]  Model reload failed: {e}")
+
+    def handle_request(self, request):
+        """
+        Handle a single decoded request
+
+        Args:
+            request: Dictionary with 'command' ('predict', 'ping', 'stats' or 'reload')
+                     and, for predictions, 'features' and 'categorical_columns'
+
+        Returns:
+            Response dictionary
+        """
+        command = request.get('command', 'predict')
+
+        if command == 'ping':
+            return {'status': 'success', 'command': 'ping'}
+
+        if command == 'stats':
+            with self._stats_lock:
+                stats = dict(self.stats)
+            return {
+                'status': 'success',
+                'command': 'stats',
+                'stats': stats,
+                'model_path': self.model_path,
+                'model_load': self.predictor.load_info,
+                'cache': self.cache.stats() if self.cache is not None else None,
+                'model_metadata': self.predictor.training_metadata
+            }
+
+        if command == 'reload':
+            self.load_model()
+            return {'status': 'success', 'command': 'reload'}
+
+        if command == 'predict':
+            predictor = self.predictor
+
+            # Large batches can be passed by path (any format load_input() accepts)
+            if 'input_file' in request:
+                request = {**load_input(request['input_file']), **request}
+
+            # Prepare on a per-request copy so requests cannot change the served
+            # model's columns or encoders; inference runs concurrently on the
+            # shared predictor (the boosters release the GIL)
+            X, _ = predictor.request_view().prepare_data(request, fit_encoders=False)
+
+            predictions, confidence = predictor.predict(
+                X, return_confidence=request.get('return_confidence', True)
+            )
+
+            return {
+                'status': 'success',
+                'command': 'predict',
+                'predictions': predictions.tolist(),
+                'confidence': confidence.tolist() if confidence is not None else None,
+                'feature_importance': predictor.get_feature_importance(),
+                'model_metadata': predictor.training_metadata
+            }
+
+        raise ValueError(f"Unknown command '{command}'")
+
+    def _process_line(self, line):
+        """Decode, handle and encode one request line"""
+        request_id = None
+        start = time.perf_counter()
+
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = self.handle_request(request)
+        except Exception as e:
+            with self._stats_lock:
+                self.stats['errors'] += 1
+            response = {'status': 'error', 'error': str(e)}
+
+        with self._stats_lock:
+            self.stats['requests'] += 1
+
+        response['id'] = request_id
+        response['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+        return json.dumps(response).encode('utf-8') + b'\n'
+
+    def serve_stream(self, rfile, wfile):
+        """
+        Serve requests from a binary line stream until EOF
+
+        Args:
+            rfile: Binary stream to read request lines from
+            wfile: Binary stream to write response lines to
+        """
+        write_lock = threading.Lock()
+        pending = []
+
+        def process_and_write(line):
+            response = self._process_line(line)
+            with write_lock:
+                wfile.write(response)
+                wfile.flush()
+
+        for line in rfile:
+            if not line.strip():
+                continue
+            pending = [f for f in pending if not f.done()]
+            pending.append(self._executor.submit(process_and_write, line))
+
+        # Drain in-flight requests before the caller closes the stream
+        for future in pending:
+            future.exception()
+
+    def serve_forever(self, port=None, host='127.0.0.1'):
+        """
+        Load the model and serve until stdin closes or the server is interrupted
+
+        Args:
+            port: TCP port to listen on; if None, serve over stdin/stdout
+            host: Interface to bind when listening on TCP
+        """
+        # Protocol owns stdout; route all progress logging to stderr
+        protocol_in = sys.stdin.buffer
+        protocol_out = sys.stdout.buffer
+        sys.stdout = sys.stderr
+
+        self.load_model()
+
+        if self.reload_interval > 0:
+            threading.Thread(target=self._watch_model, daemon=True).start()
+
+        try:
+            if port is None:
+                print(f"[INFO] Serving {self.model_path} on stdin/stdout ({self.workers} workers)")
+                self.serve_stream(protocol_in, protocol_out)
+            else:
+                server = self
+
+                class _Handler(socketserver.StreamRequestHandler):
+                    def handle(self):
+                        server.serve_stream(self.rfile, self.wfile)
+
+                socketserver.ThreadingTCPServer.allow_reuse_address = True
+                with socketserver.ThreadingTCPServer((host, port), _Handler) as tcp_server:
+                    tcp_server.daemon_threads = True
+                    print(f"[INFO] Serving {self.model_path} on {host}:{port} ({self.workers} workers)")
+                    tcp_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self._executor.shutdown(wait=True)
+
+
+def _open_npy(input_file):
+    """Memory-map an .npy feature matrix and read its schema sidecar"""
+    schema_file = f"{os.path.splitext(input_file)[0]}.schema.json"
+    if not os.path.exists(schema_file):
+        raise FileNotFoundError(f"Schema sidecar not found: {schema_file}")
+
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+
+    matrix = np.load(input_file, mmap_mode='r')
+    if matrix.ndim != 2 or matrix.shape[1] != len(schema['columns']):
+        raise ValueError(f"Matrix shape {matrix.shape} does not match {len(schema['columns'])} schema columns")
+
+    return matrix, schema
+
+
+def _npy_frame(matrix, schema):
+    """Wrap (a row slice of) an .npy matrix as a DataFrame, decoding dictionary columns"""
+    # Single-block frame backed by the memory map
+    df = pd.DataFrame(matrix, columns=schema['columns'], copy=False)
+
+    for col, dictionary in schema.get('dictionaries', {}).items():
+        df[col] = pd.Categorical.from_codes(df[col].to_numpy().astype(np.int64), categories=dictionary)
+
+    return df
+
+
+def _arrow_categorical_columns(schema):
+    """Categorical column list from Arrow schema metadata, else all string columns"""
+    metadata = schema.metadata or {}
+    categorical_columns = json.loads(metadata.get(b'categorical_columns', b'null'))
+
+    if categorical_columns is None:
+        categorical_columns = [
+            field.name for field in schema
+            if pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+            or pa.types.is_dictionary(field.type)
+        ]
+
+    return categorical_columns
+
+
+def load_input(input_file):
+    """
+    Load predictor input, choosing the reader by file extension
+
+    Supported formats:
+        .json                   Row-oriented document from GBRFeaturePreparator.exportToJSON
+        .ndjson, .jsonl         One feature record per line
+        .parquet                Parquet table (requires pyarrow)
+        .arrow, .feather, .ipc  Arrow IPC file, memory-mapped (requires pyarrow)
+        .npy                    2-D numeric matrix, memory-mapped, plus a
+                                <name>.schema.json sidecar
+
+    The .npy sidecar holds {"columns": [...], "categorical_columns": [...],
+    "dictionaries": {column: [values...]}}. Categorical columns in the matrix
+    store integer indices into their dictionary. Formats without a
+    categorical column list (NDJSON) fall back to the model's own list.
+
+    Args:
+        input_file: Path to the input file
+
+    Returns:
+        Dictionary with 'features' (list of records or DataFrame) and, where
+        known, 'categorical_columns', as accepted by prepare_data()
+    """
+    ext = os.path.splitext(input_file)[1].lower()
+
+    if ext == '.json':
+        with open(input_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    chunks = list(iter_input_chunks(input_file, chunk_size=None))
+    if len(chunks) == 1:
+        return chunks[0]
+
+    return {
+        'features': pd.concat([chunk['features'] for chunk in chunks], ignore_index=True),
+        **{k: v for k, v in chunks[0].items() if k != 'features'}
+    }
+
+
+def iter_input_chunks(input_file, chunk_size=50000):
+    """
+    Read predictor input in bounded row chunks
+
+    Accepts the same formats as load_input(). Columnar formats are sliced
+    without materializing the whole file; row-oriented .json has to be
+    parsed in full first, so prefer NDJSON or a columnar format for very
+    large inputs.
+
+    Args:
+        input_file: Path to the input file
+        chunk_size: Maximum rows per chunk (None for a single chunk)
+
+    Yields:
+        Dictionaries in the load_input() layout, one per chunk
+    """
+    ext = os.path.splitext(input_file)[1].lower()
+
+    if ext == '.json':
+        data = load_input(input_file)
+        features = data['features']
+        step = chunk_size or max(len(features), 1)
+        for start in range(0, len(features), step):
+            yield {**data, 'features': features[start:start + step]}
+
+    elif ext in ('.ndjson', '.jsonl'):
+        rows = []
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rows.append(json.loads(line))
+                if chunk_size and len(rows) >= chunk_size:
+                    yield {'features': rows}
+                    rows = []
+        if rows:
+            yield {'features': rows}
+
+    elif ext == '.npy':
+        matrix, schema = _open_npy(input_file)
+        step = chunk_size or max(len(matrix), 1)
+        for start in range(0, len(matrix), step):
+            yield {
+                'features': _npy_frame(matrix[start:start + step], schema),
+                'categorical_columns': schema.get('categorical_columns', [])
+            }
+
+    elif ext in ('.parquet', '.arrow', '.feather', '.ipc'):
+        if not HAS_PYARROW:
+            raise ImportError(f"pyarrow is required to read {ext} input")
+
+        if ext == '.parquet':
+            parquet_file = pq.ParquetFile(input_file, memory_map=True)
+            categorical_columns = _arrow_categorical_columns(parquet_file.schema_arrow)
+            if chunk_size:
+                batches = parquet_file.iter_batches(batch_size=chunk_size)
+            else:
+                batches = [parquet_file.read()]
+        else:
+            table = pa.ipc.open_file(pa.memory_map(input_file, 'r')).read_all()
+            categorical_columns = _arrow_categorical_columns(table.schema)
+            step = chunk_size or max(table.num_rows, 1)
+            # Slices of a memory-mapped table are zero-copy
+            batches = (table.slice(start, step) for start in range(0, table.num_rows, step))
+
+        for batch in batches:
+            # Numeric columns convert zero-copy where possible; strings become categoricals
+            yield {
+                'features': batch.to_pandas(strings_to_categorical=True),
+                'categorical_columns': categorical_columns
+            }
+
+    else:
+        raise ValueError(
+            f"Unsupported input format '{ext}' "
+            "(expected .json, .ndjson, .jsonl, .parquet, .arrow, .feather, .ipc or .npy)"
+        )
+
+
+def stream_predict(input_file, model_path, output_file=None, chunk_size=50000):
+    """
+    Streaming prediction: read, encode, predict and write one chunk at a time
+
+    Without an output file, NDJSON lines {"offset", "predictions", "confidence"}
+    are written to stdout followed by a final summary line. With an output
+    file ending in .bin, (prediction, confidence) pairs are appended as raw
+    little-endian float64; any other output file receives the NDJSON chunk
+    lines. In both file modes the summary is printed between the usual
+    '=' markers.
+
+    Args:
+        input_file: Feature file in any format iter_input_chunks() accepts
+        model_path: Path of the trained model
+        output_file: Optional output path (.bin for binary, otherwise NDJSON)
+        chunk_size: Maximum rows per chunk
+    """
+    to_stdout = output_file is None
+    if to_stdout:
+        # NDJSON owns stdout; route progress logging to stderr
+        out = sys.stdout
+        sys.stdout = sys.stderr
+    binary = not to_stdout and output_file.lower().endswith('.bin')
+
+    predictor = ContainerGBRPredictor(model_type='auto')
+    predictor.load(model_path)
+
+    rows = 0
+    n_chunks = 0
+    start = time.perf_counter()
+
+    if not to_stdout:
+        out = open(output_file, 'wb' if binary else 'w', encoding=None if binary else 'utf-8')
+
+    try:
+        chunks = iter_input_chunks(input_file, chunk_size=chunk_size)
+
+        for offset, predictions, confidence in predictor.predict_chunks(chunks):
+            if binary:
+                np.column_stack([predictions, confidence]).astype('<f8').tofile(out)
+            else:
+                out.write(json.dumps({
+                    'offset': offset,
+                    'predictions': predictions.tolist(),
+                    'confidence': confidence.tolist() if confidence is not None else None
+                }) + '\n')
+                out.flush()
+
+            rows += len(predictions)
+            n_chunks += 1
+    finally:
+        if not to_stdout:
+            out.close()
+
+    result = {
+        'status': 'success',
+        'command': 'predict-stream',
+        'rows': rows,
+        'chunks': n_chunks,
+        'chunk_size': chunk_size,
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'feature_importance': predictor.get_feature_importance(),
+        'model_metadata': predictor.training_metadata
+    }
+
+    if to_stdout:
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+        return
+
+    result['output_file'] = output_file
+    result['format'] = 'binary' if binary else 'ndjson'
+    if binary:
+        result['dtype'] = 'float64'
+        result['shape'] = [rows, 2]
+
+    print("\n" + "="*60)
+    print(json.dumps(result, indent=2))
+    print("="*60)
+
+
+def parse_cli_args(argv):
+    """
+    Split CLI arguments into positional arguments and --name value options
+
+    Args:
+        argv: Argument list (without the script name)
+
+    Returns:
+        positional: List of positional arguments
+        options: Dictionary of option name -> value (True for bare flags)
+    """
+    positional = []
+    options = {}
+    i = 0
+
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('--'):
+            name = arg[2:].replace('-', '_')
+            if i + 1 < len(argv) and not argv[i + 1].startswith('--'):
+                options[name] = argv[i + 1]
+                i += 1
+            else:
+                options[name] = True
+        else:
+            positional.append(arg)
+        i += 1
+
+    return positional, options
 
 
 def main():
     """CLI interface for GBR predictor"""
-    if len(sys.argv) < 3:
+    args, options = parse_cli_args(sys.argv[1:])
+
+    if len(args) < 2:
         print("Usage: python gbr_predictor.py <train|predict> <input_file> [model_path]")
+        print("       python gbr_predictor.py tune <input_file> [model_path] [--budget S] [--workers N] [--configs N] [--model-types a,b]")
+        print("       python gbr_predictor.py update <input_file> [model_path] [--rounds N] [--new-rows-only]")
+        print("       python gbr_predictor.py predict-stream <input_file> [model_path] [--output FILE] [--chunk-size N]")
+        print("       python gbr_predictor.py serve <model_path> [--port N] [--workers N] [--reload-interval S] [--cache-size N]")
+        print("       python gbr_predictor.py export-native <model_path>")
         print("\nExamples:")
         print("  python gbr_predictor.py train data.json models/gbr_model.pkl")
         print("  python gbr_predictor.py predict data.json models/gbr_model.pkl")
+        print("  python gbr_predictor.py serve models/gbr_model.pkl --port 8765")
         sys.exit(1)
 
-    command = sys.argv[1]
-    input_file = sys.argv[2]
-    model_path = sys.argv[3] if len(sys.argv) > 3 else 'models/gbr_model.pkl'
+    command = args[0]
+
+    if command == 'serve':
+        # Serve mode: load the model once and answer NDJSON requests
+        server = GBRPredictionServer(
+            model_path=args[1],
+            workers=int(options.get('workers', 4)),
+            reload_interval=float(options.get('reload_interval', 2.0)),
+            cache_size=int(options.get('cache_size', 100000))
+        )
+        port = int(options['port']) if 'port' in options else None
+        server.serve_forever(port=port, host=options.get('host', '127.0.0.1'))
+        return
+
+    if command == 'export-native':
+        # Convert an existing pickle to the fast-loading native layout
+        predictor = ContainerGBRPredictor(model_type='auto')
+        predictor.load(args[1])
+        predictor.export_native(args[1])
+        return
+
+    input_file = args[1]
+    model_path = args[2] if len(args) > 2 else 'models/gbr_model.pkl'
+
+    if command == 'predict-stream':
+        # Streaming mode: bounded-memory chunked prediction
+        stream_predict(
+            input_file, model_path,
+            output_file=options.get('output'),
+            chunk_size=int(options.get('chunk_size', 50000))
+        )
+        return
 
     # Load input data
     print(f"[INFO] Loading input from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_input(input_file)
 
     predictor = ContainerGBRPredictor(model_type='auto')
 
@@ -480,7 +2093,18 @@ def main():
             print("[ERROR] Error: No target variable found in data")
             sys.exit(1)
 
-        metrics = predictor.train(X, y)
+        # Use hyperparameters from a previous 'tune' run if one was saved next to the model
+        hyperparameters = None
+        if os.path.exists(tuned_config_path(model_path)):
+            with open(tuned_config_path(model_path), 'r', encoding='utf-8') as f:
+                tuned = json.load(f)
+            available = {'xgboost': HAS_XGBOOST, 'lightgbm': HAS_LIGHTGBM, 'sklearn': True}
+            if available.get(tuned['model_type']):
+                print(f"[INFO] Using tuned {tuned['model_type'].upper()} hyperparameters from {tuned_config_path(model_path)}")
+                predictor.model_type = tuned['model_type']
+                hyperparameters = tuned['hyperparameters']
+
+        metrics = predictor.train(X, y, hyperparameters=hyperparameters, time_values=predictor.time_values)
         predictor.save(model_path)
 
         # Output results as JSON
@@ -498,6 +2122,67 @@ def main():
         sys.stdout.flush()
         sys.stderr.flush()
 
+    elif command == 'tune':
+        # Tuning mode: search hyperparameters and save the best config next to the model
+        X, y = predictor.prepare_data(data)
+
+        if y is None or len(y) == 0:
+            print("[ERROR] Error: No target variable found in data")
+            sys.exit(1)
+
+        search = HyperparameterSearch(
+            model_types=options['model_types'].split(',') if 'model_types' in options else None,
+            n_configs=int(options.get('configs', 27)),
+            max_rounds=int(options.get('max_rounds', 400)),
+            budget_seconds=float(options.get('budget', 300)),
+            workers=int(options['workers']) if 'workers' in options else None
+        )
+        best = search.run(X, y)
+
+        if os.path.dirname(model_path):
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        write_json_atomic(tuned_config_path(model_path), best)
+
+        result = {
+            'status': 'success',
+            'command': 'tune',
+            'config_path': tuned_config_path(model_path),
+            **best
+        }
+
+        print("\n" + "="*60, flush=True)
+        print(json.dumps(result, indent=2), flush=True)
+        print("="*60, flush=True)
+
+    elif command == 'update':
+        # Incremental mode: continue boosting the saved model on new rows
+        predictor.load(model_path)
+        X, y = predictor.prepare_data(data, extend_vocabulary=True)
+
+        if y is None or len(y) == 0:
+            print("[ERROR] Error: No target variable found in data")
+            sys.exit(1)
+
+        metrics = predictor.update(
+            X, y,
+            rounds=int(options.get('rounds', 50)),
+            new_rows_only=bool(options.get('new_rows_only', False))
+        )
+        if metrics['new_samples'] > 0:
+            predictor.save(model_path)
+
+        result = {
+            'status': 'success',
+            'command': 'update',
+            'metrics': metrics,
+            'model_path': model_path,
+            'training_metadata': predictor.training_metadata
+        }
+
+        print("\n" + "="*60, flush=True)
+        print(json.dumps(result, indent=2), flush=True)
+        print("="*60, flush=True)
+
     elif command == 'predict':
         # Prediction mode
         predictor.load(model_path)
@@ -512,7 +2197,8 @@ def main():
             'predictions': predictions.tolist(),
             'confidence': confidence.tolist() if confidence is not None else None,
             'feature_importance': predictor.get_feature_importance(),
-            'model_metadata': predictor.training_metadata
+            'model_metadata': predictor.training_metadata,
+            'model_load': predictor.load_info
         }
 
         print("\n" + "="*60)
@@ -521,7 +2207,7 @@ def main():
 
     else:
         print(f"[ERROR] Error: Unknown command '{command}'")
-        print("   Valid commands: train, predict")
+        print("   Valid commands: train, tune, update, predict, predict-stream, serve, export-native")
         sys.exit(1)
 
 
@@ -4,19 +4,38 @@ Advanced Container Logistics Optimization using Google OR-Tools
 Integrates with Node.js ML and LSTM systems for optimal container management
 """
 
+import copy
+import itertools
 import json
+import multiprocessing
+import os
+import signal
+import socketserver
 import sys
+import threading
+import time
+from collections import deque
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
 
 from ortools.linear_solver import pywraplp
+from ortools.linear_solver import linear_solver_pb2
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 from ortools.sat.python import cp_model
-from ortools.graph.python import max_flow
+from ortools.graph.python import min_cost_flow
 from ortools.algorithms.python import knapsack_solver
 
 @dataclass
@@ -47,6 +66,230 @@ class Route:
     transit_time_hours: int
     capacity_teu: int
 
+class ContainerStore:
+    """
+    Columnar container storage with interned port and type codes
+
+    Containers are kept as NumPy columns (port code, type code, dwell time,
+    priority, next booking port code) plus the id list, instead of one
+    Container object each. Port and type strings are stored once in
+    port_labels/type_labels. Iterating yields Container objects for code that
+    still wants them.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.port_labels: List[str] = []
+        self.type_labels: List[str] = []
+        self._port_codes: Dict[str, int] = {}
+        self._type_codes: Dict[str, int] = {}
+        self._buffers = {
+            'port_codes': array('i'),
+            'type_codes': array('i'),
+            'dwell_times': array('q'),
+            'priorities': array('q'),
+            'next_booking_codes': array('i')
+        }
+        self._columns: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_records(cls, records) -> 'ContainerStore':
+        """Build a store from container records in the input JSON format"""
+        return cls().extend(records)
+
+    def _port_code(self, port: str) -> int:
+        code = self._port_codes.get(port)
+        if code is None:
+            code = self._port_codes[port] = len(self.port_labels)
+            self.port_labels.append(port)
+        return code
+
+    def _type_code(self, ctype: str) -> int:
+        code = self._type_codes.get(ctype)
+        if code is None:
+            code = self._type_codes[ctype] = len(self.type_labels)
+            self.type_labels.append(ctype)
+        return code
+
+    def extend(self, records) -> 'ContainerStore':
+        """Append container records from any iterable in a single pass"""
+        buffers = self._buffers
+        for container_data in records:
+            next_port = container_data.get('next_booking_port')
+            buffers['port_codes'].append(self._port_code(container_data['current_port']))
+            buffers['type_codes'].append(self._type_code(container_data['type']))
+            buffers['dwell_times'].append(int(container_data['dwell_time']))
+            buffers['priorities'].append(int(container_data['priority']))
+            buffers['next_booking_codes'].append(-1 if next_port is None else self._port_code(next_port))
+            self.ids.append(container_data['id'])
+        self._columns = {}
+        return self
+
+    def extend_columns(self, columns: Dict[str, Any]) -> 'ContainerStore':
+        """
+        Append containers given column-wise
+
+        Expects equal-length id, type, current_port, dwell_time and priority
+        columns; next_booking_port is optional and may contain nulls.
+        """
+        def intern(values, code_for):
+            local_codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+            remap = np.array([code_for(value) for value in uniques] + [-1], dtype=np.int64)
+            return remap[local_codes]  # null sentinel -1 maps to the trailing -1
+
+        n = len(columns['id'])
+        next_ports = columns.get('next_booking_port')
+        appended = {
+            'port_codes': intern(columns['current_port'], self._port_code),
+            'type_codes': intern(columns['type'], self._type_code),
+            'dwell_times': columns['dwell_time'],
+            'priorities': columns['priority'],
+            'next_booking_codes': intern(next_ports, self._port_code) if next_ports is not None else np.full(n, -1)
+        }
+        for name, values in appended.items():
+            values = np.asarray(values, dtype=self._buffers[name].typecode)
+            if len(values) != n:
+                raise ValueError(f"Container column for {name} has {len(values)} values, expected {n}")
+            self._buffers[name].frombytes(values.tobytes())
+        self.ids.extend(columns['id'])
+        self._columns = {}
+        return self
+
+    def to_columns(self) -> Dict[str, list]:
+        """Containers column-wise in the containers_columnar input format"""
+        port_labels = np.array(self.port_labels + [None], dtype=object)
+        type_labels = np.array(self.type_labels, dtype=object)
+        return {
+            'id': list(self.ids),
+            'type': type_labels[self.type_codes].tolist(),
+            'current_port': port_labels[self.port_codes].tolist(),
+            'dwell_time': self.dwell_times.tolist(),
+            'priority': self.priorities.tolist(),
+            'next_booking_port': port_labels[self.next_booking_codes].tolist()
+        }
+
+    def record(self, k: int) -> Dict[str, Any]:
+        """Container k as a record in the input JSON format"""
+        buffers = self._buffers
+        record = {
+            'id': self.ids[k],
+            'type': self.type_labels[buffers['type_codes'][k]],
+            'current_port': self.port_labels[buffers['port_codes'][k]],
+            'dwell_time': buffers['dwell_times'][k],
+            'priority': buffers['priorities'][k]
+        }
+        next_code = buffers['next_booking_codes'][k]
+        if next_code >= 0:
+            record['next_booking_port'] = self.port_labels[next_code]
+        return record
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Containers as records in the input JSON format"""
+        return [self.record(k) for k in range(len(self))]
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = np.array(self._buffers[name])
+        return self._columns[name]
+
+    @property
+    def port_codes(self) -> np.ndarray:
+        return self._column('port_codes')
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        return self._column('type_codes')
+
+    @property
+    def dwell_times(self) -> np.ndarray:
+        return self._column('dwell_times')
+
+    @property
+    def priorities(self) -> np.ndarray:
+        return self._column('priorities')
+
+    @property
+    def next_booking_codes(self) -> np.ndarray:
+        return self._column('next_booking_codes')
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        for k, container_id in enumerate(self.ids):
+            next_code = self._buffers['next_booking_codes'][k]
+            yield Container(
+                id=container_id,
+                type=self.type_labels[self._buffers['type_codes'][k]],
+                current_port=self.port_labels[self._buffers['port_codes'][k]],
+                dwell_time=self._buffers['dwell_times'][k],
+                next_booking_port=None if next_code < 0 else self.port_labels[next_code],
+                priority=self._buffers['priorities'][k]
+            )
+
+    def types(self) -> List[str]:
+        """Sorted container types present in the store"""
+        present = np.bincount(self.type_codes, minlength=len(self.type_labels)) > 0
+        return sorted(label for label, used in zip(self.type_labels, present) if used)
+
+    def counts(self, port_names: List[str], container_types: List[str]) -> np.ndarray:
+        """
+        Containers per (port, type)
+
+        Returns:
+            Array of shape (len(port_names), len(container_types)); containers at
+            ports or of types outside these lists are ignored
+        """
+        port_ids = {name: i for i, name in enumerate(port_names)}
+        type_ids = {ctype: j for j, ctype in enumerate(container_types)}
+        port_map = np.array([port_ids.get(label, -1) for label in self.port_labels] + [-1])
+        type_map = np.array([type_ids.get(label, -1) for label in self.type_labels] + [-1])
+
+        ports = port_map[self.port_codes] if len(self) else np.zeros(0, dtype=np.int64)
+        types = type_map[self.type_codes] if len(self) else np.zeros(0, dtype=np.int64)
+        known = (ports >= 0) & (types >= 0)
+        counts = np.bincount(ports[known] * len(container_types) + types[known],
+                             minlength=len(port_names) * len(container_types))
+        return counts.reshape(len(port_names), len(container_types))
+
+def solve_assignment_block(costs: np.ndarray, compatible: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Optimal container-demand matching for one block of the assignment problem
+
+    Assigning a pair is optional, so only compatible pairs with negative cost are
+    worth making. Clipping every other entry to zero turns this into a
+    rectangular linear sum assignment with the same optimum.
+
+    Returns:
+        (row indices, column indices) of the selected pairs
+    """
+    useful = compatible & (costs < 0)
+    rows = np.flatnonzero(useful.any(axis=1))
+    cols = np.flatnonzero(useful.any(axis=0))
+    if len(rows) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    block = np.where(useful[np.ix_(rows, cols)], costs[np.ix_(rows, cols)], 0.0)
+    row_ind, col_ind = linear_sum_assignment(block)
+    keep = block[row_ind, col_ind] < 0
+    return rows[row_ind[keep]], cols[col_ind[keep]]
+
+def solve_assignment_component(route_costs, container_ports, container_type_ids,
+                               demand_ports, demand_type_ids, urgency, compatibility):
+    """
+    Build the cost block for one compatibility component and solve it
+
+    Takes per-container and per-demand codes rather than the block itself so
+    process pool workers receive O(N + M) data.
+
+    Returns:
+        (row indices, column indices) of the selected pairs within the component
+    """
+    # Same terms as ContainerOptimizer._calculate_assignment_cost
+    costs = 10 + route_costs[np.ix_(container_ports, demand_ports)] - urgency[None, :]
+    compatible = compatibility[np.ix_(container_type_ids, demand_type_ids)]
+    return solve_assignment_block(costs, compatible)
+
 class ContainerOptimizer:
     """
     Multi-objective container optimization using OR-Tools:
@@ -59,13 +302,37 @@ class ContainerOptimizer:
     
     def __init__(self):
         self.ports: Dict[str, Port] = {}
-        self.containers: List[Container] = []
+        self.containers = ContainerStore()
         self.routes: List[Route] = []
         self.optimization_results = {}
+        self.options: Dict[str, Any] = {}
+
+        # Called with each redistribution relocation as it is extracted; when
+        # None, relocations are collected in the result instead
+        self.relocation_sink = None
+
+        # Previous redistribution result ({relocations, storage_plan}) used as a
+        # solution hint for the MIP
+        self.previous_solution: Optional[Dict[str, Any]] = None
+
+        # Route index (built by load_data): first route per (from, to) pair, plus
+        # dense matrices over port indices. Ports only referenced by routes are
+        # appended after the ports from the input.
+        self.route_index: Dict[Tuple[str, str], Route] = {}
+        self.port_names: List[str] = []
+        self.port_index: Dict[str, int] = {}
+        self.has_route = np.zeros((0, 0), dtype=bool)
+        self.cost_matrix = np.zeros((0, 0))
+        self.distance_matrix = np.zeros((0, 0))
+        self.capacity_matrix = np.zeros((0, 0))
         
     def load_data(self, data: Dict[str, Any]):
         """Load data from Node.js system"""
         try:
+            # Solver and model options
+            self.options = dict(data.get('options') or {})
+            self.previous_solution = data.get('previous_solution')
+
             # Parse ports data
             for port_data in data.get('ports', []):
                 self.ports[port_data['name']] = Port(
@@ -79,15 +346,9 @@ class ContainerOptimizer:
                 )
             
             # Parse containers data
-            for container_data in data.get('containers', []):
-                self.containers.append(Container(
-                    id=container_data['id'],
-                    type=container_data['type'],
-                    current_port=container_data['current_port'],
-                    dwell_time=container_data['dwell_time'],
-                    next_booking_port=container_data.get('next_booking_port'),
-                    priority=container_data['priority']
-                ))
+            self.containers.extend(data.get('containers', []))
+            if data.get('containers_columnar'):
+                self.containers.extend_columns(data['containers_columnar'])
             
             # Parse routes data
             for route_data in data.get('routes', []):
@@ -99,151 +360,273 @@ class ContainerOptimizer:
                     transit_time_hours=route_data['transit_time'],
                     capacity_teu=route_data['capacity']
                 ))
-                
+
+            self._build_route_index()
+
             return True
             
         except Exception as e:
             print(f"Error loading data: {str(e)}", file=sys.stderr)
             return False
 
+    # Scenario override keys (input JSON names) mapped to dataclass fields
+    PORT_OVERRIDE_FIELDS = {
+        'current_empty': 'current_empty',
+        'capacity': 'capacity',
+        'lstm_forecast': 'demand_forecast',
+        'storage_cost': 'storage_cost_per_day',
+        'handling_cost': 'handling_cost'
+    }
+    ROUTE_OVERRIDE_FIELDS = {
+        'distance': 'distance_km',
+        'cost': 'transport_cost',
+        'transit_time': 'transit_time_hours',
+        'capacity': 'capacity_teu'
+    }
+
+    def scenario_view(self, scenario: Dict[str, Any]) -> 'ContainerOptimizer':
+        """
+        Optimizer for a what-if scenario that shares this optimizer's parsed data
+
+        The scenario may override options, individual ports (by name) and routes
+        (by from/to) using the input JSON field names, or replace the containers
+        (containers or containers_columnar). Only overridden collections are
+        copied; the route index is rebuilt only when routes change.
+        """
+        view = copy.copy(self)
+        view.options = {**self.options, **(scenario.get('options') or {})}
+
+        if scenario.get('ports'):
+            view.ports = dict(self.ports)
+            for port_data in scenario['ports']:
+                name = port_data['name']
+                if name not in view.ports:
+                    raise ValueError(f"Scenario overrides unknown port: {name}")
+                view.ports[name] = replace(view.ports[name], **{
+                    field: port_data[key] for key, field in self.PORT_OVERRIDE_FIELDS.items() if key in port_data
+                })
+
+        if scenario.get('routes'):
+            overrides = {(r['from'], r['to']): r for r in scenario['routes']}
+            missing = set(overrides) - set(self.route_index)
+            if missing:
+                raise ValueError(f"Scenario overrides unknown routes: {sorted(missing)}")
+            view.routes = [
+                replace(route, **{
+                    field: overrides[(route.from_port, route.to_port)][key]
+                    for key, field in self.ROUTE_OVERRIDE_FIELDS.items()
+                    if key in overrides[(route.from_port, route.to_port)]
+                }) if (route.from_port, route.to_port) in overrides else route
+                for route in self.routes
+            ]
+            view._build_route_index()
+
+        if 'containers' in scenario:
+            view.containers = ContainerStore.from_records(scenario['containers'])
+        elif 'containers_columnar' in scenario:
+            view.containers = ContainerStore().extend_columns(scenario['containers_columnar'])
+        elif 'containers_columnar' in scenario:
+            view.containers = ContainerStore().extend_columns(scenario['containers_columnar'])
+
+        return view
+
+    def _build_route_index(self):
+        """Build constant-time route lookups and dense route matrices"""
+        self.route_index = {}
+        for route in self.routes:
+            # First matching route wins, as in a linear scan
+            self.route_index.setdefault((route.from_port, route.to_port), route)
+
+        self.port_names = list(self.ports.keys())
+        for from_port, to_port in self.route_index:
+            for name in (from_port, to_port):
+                if name not in self.ports and name not in self.port_names:
+                    self.port_names.append(name)
+        self.port_index = {name: i for i, name in enumerate(self.port_names)}
+
+        n = len(self.port_names)
+        self.has_route = np.zeros((n, n), dtype=bool)
+        self.cost_matrix = np.zeros((n, n))
+        self.distance_matrix = np.zeros((n, n))
+        self.capacity_matrix = np.zeros((n, n))
+
+        if self.route_index:
+            routes = list(self.route_index.values())
+            rows = np.array([self.port_index[r.from_port] for r in routes])
+            cols = np.array([self.port_index[r.to_port] for r in routes])
+            self.has_route[rows, cols] = True
+            self.cost_matrix[rows, cols] = [r.transport_cost for r in routes]
+            self.distance_matrix[rows, cols] = [r.distance_km for r in routes]
+            self.capacity_matrix[rows, cols] = [r.capacity_teu for r in routes]
+
+    def route_matrix(self, matrix: np.ndarray, default: float) -> np.ndarray:
+        """Route matrix with a default filled in for port pairs without a route"""
+        return np.where(self.has_route, matrix, default)
+
+    def inventory_counts(self, port_names: List[str], container_types: List[str]) -> np.ndarray:
+        """
+        Count containers per (port, type) in a single vectorized pass
+
+        Returns:
+            Array of shape (len(port_names), len(container_types)); containers at
+            ports or of types outside these lists are ignored
+        """
+        return self.containers.counts(port_names, container_types)
+
+    def port_arrays(self, port_names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Port capacities and daily storage costs, indexed like port_names"""
+        capacities = np.array([self.ports[port].capacity for port in port_names], dtype=np.int64)
+        storage_costs = np.array([self.ports[port].storage_cost_per_day for port in port_names], dtype=float)
+        return capacities, storage_costs
+
+    def forecast_matrix(self, port_names: List[str], start_day: int, time_horizon: int) -> np.ndarray:
+        """
+        LSTM forecast consumed per port and plan day, shape (ports, time_horizon)
+
+        Day 0 of the plan and days past a port's forecast consume nothing.
+        """
+        demand = np.zeros((len(port_names), time_horizon), dtype=np.int64)
+        for i, port in enumerate(port_names):
+            forecast = self.ports[port].demand_forecast
+            first, last = max(start_day, 1), min(start_day + time_horizon, len(forecast))
+            if first < last:
+                demand[i, first - start_day:last - start_day] = forecast[first:last]
+        return demand
+
+    def _solver_parameters(self, solver) -> pywraplp.MPSolverParameters:
+        """
+        Apply time limit, thread count and relative gap from the input options
+
+        Options: time_limit_seconds, num_threads, relative_gap
+        """
+        time_limit = self.options.get('time_limit_seconds')
+        if time_limit is not None:
+            solver.SetTimeLimit(int(float(time_limit) * 1000))
+
+        num_threads = self.options.get('num_threads')
+        if num_threads is not None and not solver.SetNumThreads(int(num_threads)):
+            print(f"Solver does not support num_threads={num_threads}", file=sys.stderr)
+
+        params = pywraplp.MPSolverParameters()
+        relative_gap = self.options.get('relative_gap')
+        if relative_gap is not None:
+            params.SetDoubleParam(pywraplp.MPSolverParameters.RELATIVE_MIP_GAP, float(relative_gap))
+        return params
+
+    def _solver_stats(self, solver, status, solve_seconds) -> Optional[Dict[str, Any]]:
+        """
+        Summarize a MIP solve that produced a usable solution
+
+        Returns:
+            Dict with status ("optimal" or "feasible"), best bound, relative gap and
+            the wall time of Solve() alone (solve_seconds, excluding model build),
+            or None when the solver has no incumbent
+        """
+        if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            return None
+
+        objective = solver.Objective().Value()
+        best_bound = solver.Objective().BestBound()
+        # Relative to the larger magnitude so the gap stays in [0, 1] around zero
+        gap = abs(objective - best_bound) / max(abs(objective), abs(best_bound), 1e-9)
+        return {
+            "status": "optimal" if status == pywraplp.Solver.OPTIMAL else "feasible",
+            "best_bound": best_bound,
+            "gap": gap,
+            "wall_time_seconds": solve_seconds
+        }
+
+    def redistribution_arcs(self, port_names: List[str]) -> List[Tuple[str, str, float, float]]:
+        """
+        Arcs available to the redistribution model as (from, to, cost, capacity)
+
+        The sparse model (default) uses only routes from the input, optionally
+        pruned to the `neighbors_k` cheapest outgoing routes per port. The dense
+        model keeps every ordered port pair, charging cost 50 and capacity 100
+        where no route exists. Port pairs without a route therefore cannot carry
+        relocations by default; when that makes the plan infeasible the error
+        names the missing routes (see _missing_route_hint).
+        """
+        arc_model = self.options.get('arc_model', 'sparse')
+        neighbors_k = self.options.get('neighbors_k')
+        in_model = set(port_names)
+
+        if arc_model == 'dense':
+            route_costs = self.route_matrix(self.cost_matrix, 50).tolist()
+            route_capacities = self.route_matrix(self.capacity_matrix, 100).tolist()
+            return [
+                (from_port, to_port,
+                 route_costs[self.port_index[from_port]][self.port_index[to_port]],
+                 route_capacities[self.port_index[from_port]][self.port_index[to_port]])
+                for from_port in port_names
+                for to_port in port_names
+                if from_port != to_port
+            ]
+        if arc_model != 'sparse':
+            raise ValueError(f"Unknown arc_model: {arc_model}")
+
+        arcs = []
+        for from_port in port_names:
+            i = self.port_index[from_port]
+            neighbours = [
+                j for j in np.flatnonzero(self.has_route[i])
+                if j != i and self.port_names[j] in in_model
+            ]
+            if neighbors_k is not None:
+                # Stable sort keeps port order between routes of equal cost
+                neighbours = sorted(neighbours, key=lambda j: self.cost_matrix[i, j])[:int(neighbors_k)]
+                neighbours.sort()
+            for j in neighbours:
+                arcs.append((from_port, self.port_names[j],
+                             float(self.cost_matrix[i, j]), float(self.capacity_matrix[i, j])))
+        return arcs
+
     def optimize_container_redistribution(self) -> Dict[str, Any]:
         """
         Multi-Commodity Flow optimization for container redistribution
         Considers LSTM forecasts for demand planning
-        """
-        
-        # Create solver
-        solver = pywraplp.Solver.CreateSolver('SCIP')
-        if not solver:
-            return {"error": "SCIP solver not available"}
 
+        Options: time_horizon (days, default 7). Setting window_days below the
+        horizon plans with a rolling horizon (see _rolling_horizon_redistribution).
+        A previous_solution in the input warm-starts the MIP (see _apply_warm_start).
+        """
         try:
             port_names = list(self.ports.keys())
-            container_types = list(set(c.type for c in self.containers))
-            time_horizon = 7  # 7-day optimization window
-            
-            # Decision variables: flow[from_port][to_port][container_type][time]
-            flow = {}
-            for from_port in port_names:
-                flow[from_port] = {}
-                for to_port in port_names:
-                    if from_port != to_port:
-                        flow[from_port][to_port] = {}
-                        for ctype in container_types:
-                            flow[from_port][to_port][ctype] = [
-                                solver.IntVar(0, 1000, f'flow_{from_port}_{to_port}_{ctype}_{t}')
-                                for t in range(time_horizon)
-                            ]
-
-            # Storage variables: storage[port][container_type][time]
-            storage = {}
-            for port in port_names:
-                storage[port] = {}
-                for ctype in container_types:
-                    storage[port][ctype] = [
-                        solver.IntVar(0, self.ports[port].capacity, f'storage_{port}_{ctype}_{t}')
-                        for t in range(time_horizon)
-                    ]
-
-            # Objective: Minimize total cost
-            objective_terms = []
+            container_types = self.containers.types()
+            time_horizon = int(self.options.get('time_horizon', 7))
 
-            # Storage costs
-            for port in port_names:
-                port_obj = self.ports[port]
-                for ctype in container_types:
-                    for t in range(time_horizon):
-                        cost_coeff = port_obj.storage_cost_per_day
-                        objective_terms.append(cost_coeff * storage[port][ctype][t])
-
-            # Transportation costs
-            for from_port in port_names:
-                for to_port in port_names:
-                    if from_port != to_port:
-                        # Find route cost
-                        route_cost = 50  # Default cost
-                        for route in self.routes:
-                            if route.from_port == from_port and route.to_port == to_port:
-                                route_cost = route.transport_cost
-                                break
-                        
-                        for ctype in container_types:
-                            for t in range(time_horizon):
-                                objective_terms.append(
-                                    route_cost * flow[from_port][to_port][ctype][t]
-                                )
+            # Starting inventory per port and type, shared by all constraints
+            inventory = self.inventory_counts(port_names, container_types)
+            initial_inventory = {
+                port: {ctype: int(inventory[i, j]) for j, ctype in enumerate(container_types)}
+                for i, port in enumerate(port_names)
+            }
 
-            solver.Minimize(solver.Sum(objective_terms))
+            arcs = self.redistribution_arcs(port_names)
 
-            # Constraints
-            
-            # 1. Flow conservation at each port
-            for port in port_names:
-                for ctype in container_types:
-                    for t in range(time_horizon):
-                        # Current inventory at port for this type
-                        current_inventory = len([c for c in self.containers 
-                                               if c.current_port == port and c.type == ctype])
-                        
-                        if t == 0:
-                            # Initial balance
-                            inflow = solver.Sum([flow[other][port][ctype][t] 
-                                               for other in port_names if other != port])
-                            outflow = solver.Sum([flow[port][other][ctype][t] 
-                                                for other in port_names if other != port])
-                            
-                            solver.Add(storage[port][ctype][t] == 
-                                     current_inventory + inflow - outflow)
-                        else:
-                            # Subsequent periods
-                            inflow = solver.Sum([flow[other][port][ctype][t] 
-                                               for other in port_names if other != port])
-                            outflow = solver.Sum([flow[port][other][ctype][t] 
-                                                for other in port_names if other != port])
-                            
-                            # Add LSTM demand forecast
-                            lstm_demand = 0
-                            if t < len(self.ports[port].demand_forecast):
-                                lstm_demand = self.ports[port].demand_forecast[t]
-                            
-                            solver.Add(storage[port][ctype][t] == 
-                                     storage[port][ctype][t-1] + inflow - outflow - lstm_demand)
-
-            # 2. Capacity constraints
-            for port in port_names:
-                for t in range(time_horizon):
-                    total_storage = solver.Sum([storage[port][ctype][t] 
-                                              for ctype in container_types])
-                    solver.Add(total_storage <= self.ports[port].capacity)
-
-            # 3. Route capacity constraints
-            for from_port in port_names:
-                for to_port in port_names:
-                    if from_port != to_port:
-                        # Find route capacity
-                        route_capacity = 100  # Default
-                        for route in self.routes:
-                            if route.from_port == from_port and route.to_port == to_port:
-                                route_capacity = route.capacity_teu
-                                break
-                        
-                        for t in range(time_horizon):
-                            total_flow = solver.Sum([flow[from_port][to_port][ctype][t] 
-                                                   for ctype in container_types])
-                            solver.Add(total_flow <= route_capacity)
+            # With interchangeable_types all types share one pool, so each port's
+            # forecast is consumed once rather than once per type.
+            if self.options.get('interchangeable_types', False) and len(container_types) > 1:
+                container_types = ["/".join(container_types)]
+                inventory = inventory.sum(axis=1, keepdims=True)
 
-            # Solve
-            print(f"🔧 Starting OR-Tools optimization with {len(self.containers)} containers across {len(port_names)} ports...")
-            
-            status = solver.Solve()
-            
-            if status == pywraplp.Solver.OPTIMAL:
-                return self._extract_redistribution_solution(solver, flow, storage, port_names, container_types, time_horizon)
+            window_days = self.options.get('window_days')
+            if window_days is not None and int(window_days) < time_horizon:
+                window_days = int(window_days)
+                commit_days = int(self.options.get('commit_days', max(1, window_days // 2)))
+                solution = self._rolling_horizon_redistribution(
+                    arcs, port_names, container_types, inventory, time_horizon, window_days, commit_days
+                )
             else:
-                return {
-                    "error": f"Optimization failed with status: {status}",
-                    "fallback_solution": self._create_fallback_solution()
-                }
+                solution = self._solve_redistribution_window(
+                    arcs, port_names, container_types, inventory, 0, time_horizon
+                )
+
+            if "error" not in solution:
+                solution["initial_inventory"] = initial_inventory
+            elif solution["error"].endswith(f"status: {pywraplp.Solver.INFEASIBLE}"):
+                self._missing_route_hint(solution, arcs, port_names, container_types, inventory, time_horizon)
+            return solution
 
         except Exception as e:
             print(f"Error in optimization: {str(e)}", file=sys.stderr)
@@ -252,57 +635,628 @@ class ContainerOptimizer:
                 "fallback_solution": self._create_fallback_solution()
             }
 
+    def _missing_route_hint(self, solution, arcs, port_names, container_types, inventory, time_horizon):
+        """
+        Explain an infeasible sparse plan by the routes it lacks
+
+        Lists port pairs without an arc from a port with spare containers of a
+        type to a port whose horizon forecast exceeds its inventory of that type
+        (the forecast is consumed per type).
+        """
+        if self.options.get('arc_model', 'sparse') != 'sparse':
+            return
+
+        demand = self.forecast_matrix(port_names, 0, time_horizon).sum(axis=1)
+        shortfall = inventory < demand[:, None]
+        spare = inventory > demand[:, None]
+        arc_pairs = {(from_port, to_port) for from_port, to_port, _, _ in arcs}
+        missing = sorted({
+            (port_names[k], port_names[i])
+            for i, j in zip(*np.nonzero(shortfall))
+            for k in np.flatnonzero(spare[:, j])
+            if k != i and (port_names[k], port_names[i]) not in arc_pairs
+        })
+        if not missing:
+            return
+
+        listed = ", ".join(f"{a}->{b}" for a, b in missing[:10])
+        more = f" and {len(missing) - 10} more" if len(missing) > 10 else ""
+        solution["error"] += (
+            f". No route reaches ports short of containers from ports with spare ones: {listed}{more}. "
+            f"Add these routes, or set arc_model to 'dense' to allow every port pair at default cost"
+        )
+        solution["missing_routes"] = [{"from": a, "to": b} for a, b in missing[:100]]
+
+    def _rolling_horizon_redistribution(self, arcs, port_names, container_types, inventory,
+                                        time_horizon, window_days, commit_days) -> Dict[str, Any]:
+        """
+        Plan a long horizon as a sequence of overlapping windows
+
+        Each window of window_days is solved optimally from the committed state,
+        its first commit_days are kept, and the storage at the end of the last
+        committed day becomes the next window's starting inventory. Solver
+        options such as time_limit_seconds apply per window. The combined plan is
+        not guaranteed to be optimal over the whole horizon, so it is reported as
+        "feasible" with no gap; per-window status and gap are listed under
+        rolling_horizon.windows.
+        """
+        commit_days = max(1, min(commit_days, window_days))
+        arc_costs = {(from_port, to_port): cost for from_port, to_port, cost, _ in arcs}
+        state = inventory.copy()
+
+        solution = {
+            "status": "feasible",
+            "total_cost": 0.0,
+            "relocations": [],
+            "storage_plan": {port: {ctype: [] for ctype in container_types} for port in port_names},
+            "recommendations": []
+        }
+        window_stats = []
+
+        for start_day in range(0, time_horizon, commit_days):
+            horizon = min(window_days, time_horizon - start_day)
+
+            # Windows collect their relocations; only committed ones are emitted
+            sink, self.relocation_sink = self.relocation_sink, None
+            try:
+                window = self._solve_redistribution_window(
+                    arcs, port_names, container_types, state, start_day, horizon
+                )
+            finally:
+                self.relocation_sink = sink
+            if "error" in window:
+                window["error"] = f"Rolling horizon window starting day {start_day + 1}: {window['error']}"
+                window["committed_days"] = start_day
+                return window
+
+            committed = min(commit_days, horizon)
+            window_stats.append({
+                "start_day": start_day + 1,
+                "days": horizon,
+                "committed_days": committed,
+                "status": window["status"],
+                "gap": window["solver_stats"]["gap"],
+                "wall_time_seconds": window["solver_stats"]["wall_time_seconds"]
+            })
+            if "warm_start" in window:
+                window_stats[-1]["warm_start"] = window["warm_start"]
+
+            for relocation in window["relocations"]:
+                if relocation["day"] <= start_day + committed:
+                    self._emit_relocation(solution, relocation)
+                    solution["total_cost"] += (
+                        relocation["quantity"] * arc_costs[(relocation["from_port"], relocation["to_port"])]
+                    )
+
+            for i, port in enumerate(port_names):
+                storage_cost = self.ports[port].storage_cost_per_day
+                for j, ctype in enumerate(container_types):
+                    kept = window["storage_plan"][port][ctype][:committed]
+                    solution["storage_plan"][port][ctype].extend(kept)
+                    solution["total_cost"] += storage_cost * sum(kept)
+                    state[i, j] = kept[-1]
+
+        solution["solver_stats"] = {
+            "status": "feasible",
+            "best_bound": None,
+            "gap": None,
+            "wall_time_seconds": sum(w["wall_time_seconds"] for w in window_stats)
+        }
+        solution["rolling_horizon"] = {
+            "time_horizon": time_horizon,
+            "window_days": window_days,
+            "commit_days": commit_days,
+            "windows": window_stats
+        }
+        solution["recommendations"] = self._generate_recommendations(solution)
+
+        return solution
+
+    def _emit_relocation(self, solution: Dict[str, Any], relocation: Dict[str, Any]):
+        """Add a relocation to the solution, or hand it to the relocation sink"""
+        if self.relocation_sink is None:
+            solution["relocations"].append(relocation)
+            return
+
+        self.relocation_sink(relocation)
+        streamed = solution.setdefault("streamed_relocations", {"count": 0, "high_priority": 0})
+        streamed["count"] += 1
+        if relocation["priority"] == "high":
+            streamed["high_priority"] += 1
+
+    def _solve_redistribution_window(self, arcs, port_names, container_types, inventory,
+                                     start_day, time_horizon) -> Dict[str, Any]:
+        """
+        Solve redistribution over plan days start_day .. start_day + time_horizon - 1
+
+        Args:
+            inventory: Starting inventory, shape (len(port_names), len(container_types))
+
+        Returns:
+            Solution dict with relocation days numbered from the start of the plan,
+            or an error dict
+        """
+        # Single commodity: solve as a time-expanded min-cost flow when possible
+        if len(container_types) == 1 and self.options.get('min_cost_flow', True):
+            solution = self._solve_redistribution_min_cost_flow(
+                arcs, port_names, container_types[0], inventory[:, 0], start_day, time_horizon
+            )
+            if solution is not None:
+                if self.previous_solution and "error" not in solution:
+                    # Network simplex takes no hint and is fast without one
+                    solution["warm_start"] = {"applied": False, "reason": "solved as min-cost flow"}
+                return solution
+
+        # Create solver
+        solver = pywraplp.Solver.CreateSolver('SCIP')
+        if not solver:
+            return {"error": "SCIP solver not available"}
+
+        in_arcs = {port: [] for port in port_names}
+        out_arcs = {port: [] for port in port_names}
+        for from_port, to_port, _, _ in arcs:
+            out_arcs[from_port].append((from_port, to_port))
+            in_arcs[to_port].append((from_port, to_port))
+
+        # Decision variables: flow[(from_port, to_port)][container_type][time], one per arc
+        flow = {}
+        for from_port, to_port, _, _ in arcs:
+            flow[(from_port, to_port)] = {
+                ctype: [
+                    solver.IntVar(0, 1000, f'flow_{from_port}_{to_port}_{ctype}_{t}')
+                    for t in range(time_horizon)
+                ]
+                for ctype in container_types
+            }
+
+        # Storage variables: storage[port][container_type][time]
+        storage = {}
+        for port in port_names:
+            storage[port] = {}
+            for ctype in container_types:
+                storage[port][ctype] = [
+                    solver.IntVar(0, self.ports[port].capacity, f'storage_{port}_{ctype}_{t}')
+                    for t in range(time_horizon)
+                ]
+
+        # Objective: Minimize total cost
+        objective_terms = []
+
+        # Storage costs
+        for port in port_names:
+            port_obj = self.ports[port]
+            for ctype in container_types:
+                for t in range(time_horizon):
+                    cost_coeff = port_obj.storage_cost_per_day
+                    objective_terms.append(cost_coeff * storage[port][ctype][t])
+
+        # Transportation costs
+        for from_port, to_port, route_cost, _ in arcs:
+            for ctype in container_types:
+                for t in range(time_horizon):
+                    objective_terms.append(
+                        route_cost * flow[(from_port, to_port)][ctype][t]
+                    )
+
+        solver.Minimize(solver.Sum(objective_terms))
+
+        # Constraints
+        
+        # 1. Flow conservation at each port
+        forecast = self.forecast_matrix(port_names, start_day, time_horizon)
+        for i, port in enumerate(port_names):
+            for j, ctype in enumerate(container_types):
+                current_inventory = int(inventory[i, j])
+                for t in range(time_horizon):
+                    inflow = solver.Sum([flow[arc][ctype][t] for arc in in_arcs[port]])
+                    outflow = solver.Sum([flow[arc][ctype][t] for arc in out_arcs[port]])
+
+                    # Add LSTM demand forecast
+                    lstm_demand = int(forecast[i, t])
+
+                    if t == 0:
+                        # Initial balance
+                        solver.Add(storage[port][ctype][t] == 
+                                 current_inventory + inflow - outflow - lstm_demand)
+                    else:
+                        solver.Add(storage[port][ctype][t] == 
+                                 storage[port][ctype][t-1] + inflow - outflow - lstm_demand)
+
+        # 2. Capacity constraints
+        for port in port_names:
+            for t in range(time_horizon):
+                total_storage = solver.Sum([storage[port][ctype][t] 
+                                          for ctype in container_types])
+                solver.Add(total_storage <= self.ports[port].capacity)
+
+        # 3. Route capacity constraints
+        for from_port, to_port, _, route_capacity in arcs:
+            for t in range(time_horizon):
+                total_flow = solver.Sum([flow[(from_port, to_port)][ctype][t]
+                                       for ctype in container_types])
+                solver.Add(total_flow <= route_capacity)
+
+        model_stats = {
+            "arc_model": self.options.get('arc_model', 'sparse'),
+            "arcs": len(arcs),
+            "variables": solver.NumVariables(),
+            "constraints": solver.NumConstraints()
+        }
+
+        # Solve
+        print(f"🔧 Starting OR-Tools optimization with {len(self.containers)} containers across "
+              f"{len(port_names)} ports ({len(arcs)} arcs, {model_stats['variables']} variables, "
+              f"{model_stats['constraints']} constraints)...", file=sys.stderr)
+
+        params = self._solver_parameters(solver)
+        warm_start = None
+        if self.previous_solution:
+            warm_start = self._apply_warm_start(
+                solver, params, flow, storage, port_names, container_types, inventory, forecast,
+                start_day, time_horizon
+            )
+
+        solve_start = time.perf_counter()
+        status = solver.Solve(params)
+        solver_stats = self._solver_stats(solver, status, time.perf_counter() - solve_start)
+
+        if solver_stats is not None:
+            solution = self._extract_redistribution_solution(
+                solver, flow, storage, port_names, container_types, start_day, time_horizon, solver_stats
+            )
+            solution["model_stats"] = model_stats
+            if warm_start is not None:
+                solution["warm_start"] = warm_start
+            return solution
+        else:
+            return {
+                "error": f"Optimization failed with status: {status}",
+                "model_stats": model_stats,
+                "fallback_solution": self._create_fallback_solution()
+            }
+
+    def _warm_start_hint(self, flow, storage, port_names, container_types, inventory, forecast,
+                         start_day, time_horizon):
+        """
+        Map self.previous_solution onto this window's flow and storage variables
+
+        Previous plan day d becomes day d - warm_start_offset_days (e.g. 1 when
+        re-planning a day later). Every flow variable is hinted, zero where the
+        previous plan had no relocation. With previous relocations, storage is
+        hinted as implied by those flows under the current inventory and forecast,
+        which keeps the hint consistent with the balance constraints; otherwise
+        the previous storage plan (nested or flat) is used where it covers the day.
+        Types of a pooled model ("20GP/40HC") collect their member types. Values
+        are clipped to the variable bounds; a clipped hint is no longer a feasible
+        solution and mostly guides SCIP's search.
+
+        Returns:
+            (variables, values, relocations mapped, relocations dropped,
+             values clipped, storage source)
+        """
+        offset = int(self.options.get('warm_start_offset_days', 0))
+        model_type = {member: ctype for ctype in container_types for member in ctype.split('/')}
+
+        flow_hint = {}
+        mapped = dropped = 0
+        for relocation in self.previous_solution.get('relocations') or []:
+            t = int(relocation['day']) - 1 - offset - start_day
+            ctype = model_type.get(relocation['container_type'])
+            arc = (relocation['from_port'], relocation['to_port'])
+            if 0 <= t < time_horizon and ctype is not None and arc in flow:
+                key = (arc, ctype, t)
+                flow_hint[key] = flow_hint.get(key, 0) + int(relocation['quantity'])
+                mapped += 1
+            else:
+                dropped += 1
+
+        storage_hint = {}
+        if 'relocations' in self.previous_solution:
+            storage_source = "implied"
+            port_ids = {port: i for i, port in enumerate(port_names)}
+            type_ids = {ctype: j for j, ctype in enumerate(container_types)}
+            net = np.zeros((len(port_names), len(container_types), time_horizon))
+            for ((from_port, to_port), ctype, t), quantity in flow_hint.items():
+                net[port_ids[to_port], type_ids[ctype], t] += quantity
+                net[port_ids[from_port], type_ids[ctype], t] -= quantity
+            implied = inventory[:, :, None] + np.cumsum(net - forecast[:, None, :], axis=2)
+            for i, port in enumerate(port_names):
+                for j, ctype in enumerate(container_types):
+                    for t in range(time_horizon):
+                        storage_hint[(port, ctype, t)] = int(implied[i, j, t])
+        else:
+            storage_source = "previous_plan"
+            for port, ctype, t, value in self._previous_storage(storage, model_type, offset + start_day,
+                                                                 time_horizon):
+                storage_hint[(port, ctype, t)] = storage_hint.get((port, ctype, t), 0) + value
+
+        variables, values = [], []
+        clipped = 0
+        hints = [(var, flow_hint.get((arc, ctype, t), 0))
+                 for arc, by_type in flow.items() for ctype, arc_vars in by_type.items()
+                 for t, var in enumerate(arc_vars)]
+        hints.extend((storage[port][ctype][t], value) for (port, ctype, t), value in storage_hint.items())
+        for var, value in hints:
+            hinted = min(max(value, var.lb()), var.ub())
+            clipped += hinted != value
+            variables.append(var)
+            values.append(hinted)
+
+        return variables, values, mapped, dropped, clipped, storage_source
+
+    def _previous_storage(self, storage, model_type, shift, time_horizon):
+        """Yield (port, model type, t, value) from the previous storage plan, nested or flat"""
+        storage_plan = self.previous_solution.get('storage_plan') or {}
+        if 'values' in storage_plan:
+            n_types, n_days = storage_plan['shape'][1], storage_plan['shape'][2]
+            values = storage_plan['values']
+            storage_plan = {
+                port: {
+                    ptype: values[(i * n_types + j) * n_days:(i * n_types + j + 1) * n_days]
+                    for j, ptype in enumerate(storage_plan['types'])
+                }
+                for i, port in enumerate(storage_plan['ports'])
+            }
+
+        for port, plan in storage_plan.items():
+            if port not in storage:
+                continue
+            for ptype, days in plan.items():
+                ctype = model_type.get(ptype)
+                if ctype is None:
+                    continue
+                for day, value in enumerate(days):
+                    if 0 <= day - shift < time_horizon:
+                        yield port, ctype, day - shift, int(value)
+
+    def _apply_warm_start(self, solver, params, flow, storage, port_names, container_types,
+                          inventory, forecast, start_day, time_horizon) -> Dict[str, Any]:
+        """
+        Hint the MIP with the previous solution
+
+        With the measure_warm_start option, copies of the model are first solved to
+        their first feasible solution without and with the hint, so the report
+        includes both times. Each probe stops after warm_start_probe_seconds
+        (default 5, at most a quarter of time_limit_seconds), and the time they
+        take is deducted from the main solve's time limit.
+
+        Returns:
+            Report of hinted variables, mapped relocations and, if measured,
+            time-to-first-feasible with and without the hint
+        """
+        variables, values, mapped, dropped, clipped, storage_source = self._warm_start_hint(
+            flow, storage, port_names, container_types, inventory, forecast, start_day, time_horizon
+        )
+        report = {
+            "applied": True,
+            "hinted_variables": len(variables),
+            "relocations_mapped": mapped,
+            "relocations_dropped": dropped,
+            "storage_hint": storage_source,
+            "clipped_values": clipped
+        }
+
+        if self.options.get('measure_warm_start', False):
+            # Time each probe on a copy of the model that stops at its first
+            # incumbent (SCIP parameter), leaving the real solve untouched
+            model = linear_solver_pb2.MPModelProto()
+            solver.ExportModelToProto(model)
+            time_limit = self.options.get('time_limit_seconds')
+            probe_limit = float(self.options.get('warm_start_probe_seconds', 5.0))
+            if time_limit is not None:
+                probe_limit = min(probe_limit, float(time_limit) / 4)
+            probes_start = time.perf_counter()
+            first_feasible = {}
+            for label, hinted in (("cold", False), ("warm", True)):
+                probe = pywraplp.Solver.CreateSolver('SCIP')
+                probe.LoadModelFromProto(model)
+                probe_params = self._solver_parameters(probe)
+                probe.SetTimeLimit(int(probe_limit * 1000))
+                probe.SetSolverSpecificParametersAsString("limits/solutions = 1")
+                if hinted:
+                    probe_vars = probe.variables()
+                    probe.SetHint([probe_vars[var.index()] for var in variables], values)
+                solve_start = time.perf_counter()
+                status = probe.Solve(probe_params)
+                solve_seconds = time.perf_counter() - solve_start
+                found = status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE)
+                first_feasible[label] = solve_seconds if found else None
+
+            if time_limit is not None:
+                remaining = float(time_limit) - (time.perf_counter() - probes_start)
+                solver.SetTimeLimit(max(1, int(remaining * 1000)))
+
+            report["time_to_first_feasible_seconds"] = first_feasible
+            if first_feasible["cold"] is not None and first_feasible["warm"]:
+                report["speedup"] = round(first_feasible["cold"] / first_feasible["warm"], 2)
+
+        solver.SetHint(variables, values)
+        return report
+
+    def _solve_redistribution_min_cost_flow(self, arcs, port_names, commodity, inventory, start_day, time_horizon):
+        """
+        Solve single-commodity redistribution as a time-expanded min-cost flow
+
+        Node (port, t) balances the day's storage: holding arcs (port, t) -> (port, t+1)
+        carry storage[port][t] at the daily storage cost, transport arcs
+        (from, t) -> (to, t) carry relocations, and each day consumes the LSTM
+        forecast as node demand. Final storage drains into a sink node. This is the
+        same model as the MIP restricted to one container type.
+
+        Returns:
+            Solution dict, error dict when the network is infeasible, or None when
+            the network cannot represent the problem and the MIP should be used
+        """
+        n_ports = len(port_names)
+        port_ids = {name: i for i, name in enumerate(port_names)}
+        sink = n_ports * time_horizon
+        capacities, storage_costs = self.port_arrays(port_names)
+
+        # Network simplex needs integer costs; scale decimal costs, else give up
+        route_costs = np.array([arc[2] for arc in arcs], dtype=float)
+        costs = np.concatenate([storage_costs, route_costs])
+        scale = next((10 ** d for d in range(7)
+                      if np.all(np.abs(costs * 10 ** d - np.round(costs * 10 ** d)) < 1e-9)), None)
+        if scale is None:
+            return None
+
+        # Node (port i, day t) is i * time_horizon + t
+        days = np.arange(time_horizon)
+        arc_from = np.array([port_ids[arc[0]] for arc in arcs], dtype=np.int64)
+        arc_to = np.array([port_ids[arc[1]] for arc in arcs], dtype=np.int64)
+        arc_capacities = np.minimum(1000, np.array([arc[3] for arc in arcs], dtype=float)).astype(np.int64)
+
+        # Transport arcs, arc-major then day
+        transport_arc = np.repeat(np.arange(len(arcs)), time_horizon)
+        transport_day = np.tile(days, len(arcs))
+        transport_tails = arc_from[transport_arc] * time_horizon + transport_day
+        transport_heads = arc_to[transport_arc] * time_horizon + transport_day
+        n_transport = len(transport_tails)
+
+        # Holding arcs carry storage to the next day, or into the sink after the last day
+        holding_tails = np.arange(sink)
+        holding_heads = np.where((holding_tails + 1) % time_horizon == 0, sink, holding_tails + 1)
+
+        tails = np.concatenate([transport_tails, holding_tails])
+        heads = np.concatenate([transport_heads, holding_heads])
+        arc_caps = np.concatenate([arc_capacities[transport_arc], np.repeat(capacities, time_horizon)])
+        unit_costs = np.concatenate([
+            np.round(route_costs * scale).astype(np.int64)[transport_arc],
+            np.repeat(np.round(storage_costs * scale).astype(np.int64), time_horizon)
+        ])
+
+        supplies = np.zeros(sink + 1, dtype=np.int64)
+        supplies[:sink] = -self.forecast_matrix(port_names, start_day, time_horizon).ravel()
+        supplies[np.arange(n_ports) * time_horizon] += np.asarray(inventory, dtype=np.int64)
+        supplies[sink] = -supplies[:sink].sum()
+
+        model_stats = {
+            "solver": "min_cost_flow",
+            "arc_model": self.options.get('arc_model', 'sparse'),
+            "arcs": len(arcs),
+            "nodes": int(sink + 1),
+            "network_arcs": len(tails)
+        }
+        infeasible = {
+            "error": f"Optimization failed with status: {pywraplp.Solver.INFEASIBLE}",
+            "model_stats": model_stats,
+            "fallback_solution": self._create_fallback_solution()
+        }
+        if supplies[sink] > 0:
+            # Forecast demand exceeds the containers available
+            return infeasible
+
+        smcf = min_cost_flow.SimpleMinCostFlow()
+        smcf.add_arcs_with_capacity_and_unit_cost(tails, heads, arc_caps, unit_costs)
+        smcf.set_nodes_supplies(np.arange(sink + 1), supplies)
+
+        print(f"🔧 Solving redistribution as min-cost flow: {sink + 1} nodes, "
+              f"{len(tails)} arcs...", file=sys.stderr)
+        start_time = time.perf_counter()
+        status = smcf.solve()
+        wall_time = time.perf_counter() - start_time
+        if status == smcf.INFEASIBLE:
+            return infeasible
+        if status != smcf.OPTIMAL:
+            return None
+
+        flows = smcf.flows(np.arange(len(tails)))
+        total_cost = smcf.optimal_cost() / scale
+        solution = {
+            "status": "optimal",
+            "total_cost": total_cost,
+            "relocations": [],
+            "storage_plan": {},
+            "recommendations": [],
+            "solver_stats": {
+                "status": "optimal",
+                "best_bound": total_cost,
+                "gap": 0.0,
+                "wall_time_seconds": wall_time
+            },
+            "model_stats": model_stats
+        }
+
+        for k in np.flatnonzero(flows[:n_transport] > 0):
+            from_port, to_port = arcs[transport_arc[k]][:2]
+            day = start_day + int(transport_day[k])
+            self._emit_relocation(solution, {
+                "from_port": from_port,
+                "to_port": to_port,
+                "container_type": commodity,
+                "quantity": int(flows[k]),
+                "day": day + 1,
+                "priority": "high" if day <= 2 else "medium"
+            })
+
+        holding = flows[n_transport:].reshape(n_ports, time_horizon)
+        for i, port in enumerate(port_names):
+            solution["storage_plan"][port] = {commodity: holding[i].astype(int).tolist()}
+
+        solution["recommendations"] = self._generate_recommendations(solution)
+
+        return solution
+
+    def routing_distance_matrix(self, relocations: List[Dict]) -> np.ndarray:
+        """
+        Integer arc costs between relocation nodes, with node 0 as the depot
+
+        Travelling from node i to node j costs the route distance from relocation
+        i's origin to relocation j's destination (1000 when no route exists);
+        arcs to or from the depot are free.
+        """
+        n_ports = len(self.port_names)
+        distances = np.full((n_ports + 1, n_ports + 1), 1000, dtype=np.int64)
+        distances[:n_ports, :n_ports] = np.trunc(self.route_matrix(self.distance_matrix, 1000))
+
+        from_ports = np.array([self.port_index.get(r['from_port'], n_ports) for r in relocations])
+        to_ports = np.array([self.port_index.get(r['to_port'], n_ports) for r in relocations])
+
+        matrix = np.zeros((len(relocations) + 1, len(relocations) + 1), dtype=np.int64)
+        matrix[1:, 1:] = distances[np.ix_(from_ports, to_ports)]
+        return matrix
+
     def optimize_vehicle_routing(self, relocations: List[Dict]) -> Dict[str, Any]:
         """
         Vehicle Routing Problem for efficient empty container pickup/delivery
+
+        Options: vehicles (default 1), vehicle_capacity (int or per-vehicle list,
+        default 100) and routing_time_limit_seconds. With a routing time limit the
+        search improves the first solution with guided local search, which always
+        runs until the limit is reached; without one only the first solution is
+        built. The MIP time_limit_seconds does not apply here.
         """
         try:
             if not relocations:
                 return {"routes": [], "total_cost": 0, "total_distance": 0}
 
+            num_vehicles = int(self.options.get('vehicles', 1))
+            capacity = self.options.get('vehicle_capacity', 100)
+            capacities = [int(c) for c in capacity] if isinstance(capacity, list) else [int(capacity)] * num_vehicles
+            if len(capacities) != num_vehicles:
+                return {"error": f"vehicle_capacity lists {len(capacities)} vehicles, expected {num_vehicles}"}
+
             # Create routing model
             manager = pywrapcp.RoutingIndexManager(
                 len(relocations) + 1,  # +1 for depot
-                1,  # number of vehicles
+                num_vehicles,
                 0   # depot index
             )
             
             routing = pywrapcp.RoutingModel(manager)
 
-            # Distance callback
-            def distance_callback(from_index, to_index):
-                from_node = manager.IndexToNode(from_index)
-                to_node = manager.IndexToNode(to_index)
-                
-                if from_node == 0 or to_node == 0:  # depot
-                    return 0
-                
-                # Calculate distance between ports
-                from_port = relocations[from_node - 1]['from_port']
-                to_port = relocations[to_node - 1]['to_port']
-                
-                # Find route distance
-                for route in self.routes:
-                    if route.from_port == from_port and route.to_port == to_port:
-                        return int(route.distance_km)
-                
-                return 1000  # High penalty for unknown routes
-
-            transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+            # Distances are precomputed so the solver never calls back into Python
+            distance_matrix = self.routing_distance_matrix(relocations)
+            transit_callback_index = routing.RegisterTransitMatrix(distance_matrix.tolist())
             routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
             # Add capacity constraint
-            def demand_callback(from_index):
-                from_node = manager.IndexToNode(from_index)
-                if from_node == 0:  # depot
-                    return 0
-                return relocations[from_node - 1]['container_count']
-
-            demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+            demands = [0] + [int(r['container_count']) for r in relocations]
+            demand_callback_index = routing.RegisterUnaryTransitVector(demands)
             routing.AddDimensionWithVehicleCapacity(
                 demand_callback_index,
                 0,  # null capacity slack
-                [100],  # vehicle maximum capacity
+                capacities,  # vehicle maximum capacities
                 True,  # start cumul to zero
                 'Capacity'
             )
@@ -312,7 +1266,14 @@ class ContainerOptimizer:
             search_parameters.first_solution_strategy = (
                 routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
             )
+            time_limit = self.options.get('routing_time_limit_seconds')
+            if time_limit is not None:
+                search_parameters.local_search_metaheuristic = (
+                    routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+                )
+                search_parameters.time_limit.FromMilliseconds(int(float(time_limit) * 1000))
 
+            print(f"🔧 Routing {len(relocations)} relocations with {num_vehicles} vehicle(s)...", file=sys.stderr)
             solution = routing.SolveWithParameters(search_parameters)
             
             if solution:
@@ -324,10 +1285,178 @@ class ContainerOptimizer:
             print(f"Error in vehicle routing: {str(e)}", file=sys.stderr)
             return {"error": str(e)}
 
-    def optimize_assignment(self, containers: List[Dict], demands: List[Dict]) -> Dict[str, Any]:
+    def optimize_assignment(self, containers, demands: List[Dict]) -> Dict[str, Any]:
         """
         Assignment Problem: Optimally assign containers to future bookings
+
+        Costs are built as a matrix per compatibility component and each component
+        is solved as a linear sum assignment. Set options.assignment_solver to
+        "mip" for the SCIP formulation.
+
+        Args:
+            containers: Container records, or a ContainerStore whose columns are
+                read directly (records are built only for the result)
+            demands: Demand records
         """
+        if self.options.get('assignment_solver', 'lsa') == 'mip':
+            if isinstance(containers, ContainerStore):
+                containers = containers.records()
+            return self._optimize_assignment_mip(containers, demands)
+
+        try:
+            if isinstance(containers, ContainerStore):
+                store, container_record = containers, containers.record
+            else:
+                store, container_record = ContainerStore.from_records(containers), containers.__getitem__
+
+            if not len(store) or not demands:
+                return {"assignments": [],
+                        "unassigned_containers": [container_record(i) for i in range(len(store))]}
+
+            start_time = time.perf_counter()
+            required_types = [d['required_type'] for d in demands]
+            types = sorted(set(store.types()) | set(required_types))
+            type_ids = {t: k for k, t in enumerate(types)}
+            compatibility = np.array([[self._is_compatible(a, b) for b in types] for a in types])
+
+            # Ports without routes (or unknown ports) map to a zero-cost padding row
+            n_ports = len(self.port_names)
+            route_costs = np.zeros((n_ports + 1, n_ports + 1))
+            route_costs[:n_ports, :n_ports] = self.route_matrix(self.cost_matrix, 0)
+            port_map = np.array([self.port_index.get(label, n_ports) for label in store.port_labels])
+            type_map = np.array([type_ids.get(label, -1) for label in store.type_labels])
+            container_ports = port_map[store.port_codes]
+            container_type_ids = type_map[store.type_codes]
+            demand_ports = np.array([self.port_index.get(d['port'], n_ports) for d in demands])
+            demand_type_ids = np.array([type_ids[t] for t in required_types])
+            urgency = np.array([d.get('priority', 0) for d in demands], dtype=float) * 5
+
+            components = self._compatibility_components(types, compatibility)
+            blocks = []
+            for component in components:
+                rows = np.flatnonzero(np.isin(container_type_ids, component))
+                cols = np.flatnonzero(np.isin(demand_type_ids, component))
+                if len(rows) > 0 and len(cols) > 0:
+                    blocks.append((rows, cols))
+
+            tasks = [
+                (route_costs, container_ports[rows], container_type_ids[rows],
+                 demand_ports[cols], demand_type_ids[cols], urgency[cols], compatibility)
+                for rows, cols in blocks
+            ]
+            workers = self._assignment_workers(blocks)
+            if workers > 1:
+                # Components are independent; solve them concurrently
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(solve_assignment_component, *zip(*tasks)))
+            else:
+                results = [solve_assignment_component(*task) for task in tasks]
+
+            selected_rows, selected_cols = [], []
+            for (rows, cols), (block_rows, block_cols) in zip(blocks, results):
+                selected_rows.append(rows[block_rows])
+                selected_cols.append(cols[block_cols])
+
+            pairs = sorted(zip(np.concatenate(selected_rows or [np.zeros(0, dtype=np.int64)]).tolist(),
+                               np.concatenate(selected_cols or [np.zeros(0, dtype=np.int64)]).tolist()))
+
+            solution = self._assignment_solution_from_pairs(pairs, container_record, len(store), demands)
+            solution["solver_stats"] = {
+                "status": "optimal",
+                "best_bound": solution["total_cost"],
+                "gap": 0.0,
+                "wall_time_seconds": time.perf_counter() - start_time
+            }
+            solution["model_stats"] = {
+                "solver": "linear_sum_assignment",
+                "components": len(blocks),
+                "component_sizes": [[len(rows), len(cols)] for rows, cols in blocks],
+                "workers": workers
+            }
+            return solution
+
+        except Exception as e:
+            print(f"Error in assignment optimization: {str(e)}", file=sys.stderr)
+            return {"error": str(e)}
+
+    def _assignment_workers(self, blocks) -> int:
+        """
+        Number of processes for solving assignment components
+
+        options.assignment_workers overrides the default, which uses one process
+        per component (up to the CPU count) once the largest component has at
+        least options.parallel_min_pairs container-demand pairs (default 250000).
+        Smaller problems are solved in-process since pool startup would dominate.
+        """
+        if len(blocks) < 2:
+            return 1
+        workers = self.options.get('assignment_workers')
+        if workers is not None:
+            return max(1, min(int(workers), len(blocks)))
+
+        largest = max(len(rows) * len(cols) for rows, cols in blocks)
+        if largest < self.options.get('parallel_min_pairs', 250000):
+            return 1
+        return max(1, min(len(blocks), os.cpu_count() or 1))
+
+    def _compatibility_components(self, types: List[str], compatibility: np.ndarray) -> List[List[int]]:
+        """Group type ids into connected components of the compatibility graph"""
+        parent = list(range(len(types)))
+
+        def find(k):
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        for a, b in zip(*np.nonzero(compatibility)):
+            parent[find(a)] = find(b)
+
+        components: Dict[int, List[int]] = {}
+        for k in range(len(types)):
+            components.setdefault(find(k), []).append(k)
+        return list(components.values())
+
+    def _assignment_solution_from_pairs(self, pairs, container_record, n_containers, demands) -> Dict[str, Any]:
+        """
+        Build the assignment result from selected (container, demand) index pairs
+
+        container_record(i) returns container i as an input record.
+        """
+        solution = {
+            "status": "optimal",
+            "assignments": [],
+            "unassigned_containers": [],
+            "unmet_demands": [],
+            "total_cost": 0.0
+        }
+
+        for i, j in pairs:
+            container = container_record(i)
+            cost = self._calculate_assignment_cost(container, demands[j])
+            solution["assignments"].append({
+                "container_id": container['id'],
+                "demand_id": demands[j]['id'],
+                "from_port": container['current_port'],
+                "to_port": demands[j]['port'],
+                "container_type": container['type'],
+                "cost": cost
+            })
+            solution["total_cost"] += cost
+
+        assigned_containers = {i for i, _ in pairs}
+        assigned_demands = {j for _, j in pairs}
+        solution["unassigned_containers"] = [
+            container_record(i) for i in range(n_containers) if i not in assigned_containers
+        ]
+        solution["unmet_demands"] = [
+            demands[j] for j in range(len(demands)) if j not in assigned_demands
+        ]
+
+        return solution
+
+    def _optimize_assignment_mip(self, containers: List[Dict], demands: List[Dict]) -> Dict[str, Any]:
+        """Assignment as a binary SCIP model over all container-demand pairs"""
         try:
             if not containers or not demands:
                 return {"assignments": [], "unassigned_containers": containers}
@@ -375,10 +1504,13 @@ class ContainerOptimizer:
                         solver.Add(x[i][j] == 0)
 
             # Solve
-            status = solver.Solve()
-            
-            if status == pywraplp.Solver.OPTIMAL:
-                return self._extract_assignment_solution(solver, x, containers, demands)
+            params = self._solver_parameters(solver)
+            solve_start = time.perf_counter()
+            status = solver.Solve(params)
+            solver_stats = self._solver_stats(solver, status, time.perf_counter() - solve_start)
+
+            if solver_stats is not None:
+                return self._extract_assignment_solution(solver, x, containers, demands, solver_stats)
             else:
                 return {"error": f"Assignment optimization failed: {status}"}
 
@@ -386,32 +1518,33 @@ class ContainerOptimizer:
             print(f"Error in assignment optimization: {str(e)}", file=sys.stderr)
             return {"error": str(e)}
 
-    def _extract_redistribution_solution(self, solver, flow, storage, port_names, container_types, time_horizon):
+    def _extract_redistribution_solution(self, solver, flow, storage, port_names, container_types, start_day,
+                                         time_horizon, solver_stats):
         """Extract solution from redistribution optimization"""
         solution = {
-            "status": "optimal",
+            "status": solver_stats["status"],
             "total_cost": solver.Objective().Value(),
             "relocations": [],
             "storage_plan": {},
-            "recommendations": []
+            "recommendations": [],
+            "solver_stats": solver_stats
         }
         
         # Extract relocations
-        for from_port in port_names:
-            for to_port in port_names:
-                if from_port != to_port:
-                    for ctype in container_types:
-                        for t in range(time_horizon):
-                            flow_value = flow[from_port][to_port][ctype][t].solution_value()
-                            if flow_value > 0:
-                                solution["relocations"].append({
-                                    "from_port": from_port,
-                                    "to_port": to_port,
-                                    "container_type": ctype,
-                                    "quantity": int(flow_value),
-                                    "day": t + 1,
-                                    "priority": "high" if t <= 2 else "medium"
-                                })
+        for (from_port, to_port), arc_flow in flow.items():
+            for ctype in container_types:
+                for t in range(time_horizon):
+                    flow_value = arc_flow[ctype][t].solution_value()
+                    if flow_value > 0:
+                        day = start_day + t
+                        self._emit_relocation(solution, {
+                            "from_port": from_port,
+                            "to_port": to_port,
+                            "container_type": ctype,
+                            "quantity": int(flow_value),
+                            "day": day + 1,
+                            "priority": "high" if day <= 2 else "medium"
+                        })
 
         # Extract storage plan
         for port in port_names:
@@ -434,26 +1567,42 @@ class ContainerOptimizer:
             "routes": []
         }
         
-        vehicle_id = 0
-        index = routing.Start(vehicle_id)
-        route = []
-        
-        while not routing.IsEnd(index):
-            node = manager.IndexToNode(index)
-            if node > 0:  # Skip depot
-                route.append(relocations[node - 1])
-            index = solution.Value(routing.NextVar(index))
-        
-        route_data["routes"] = [route]
+        route_data["vehicle_stats"] = []
+
+        for vehicle_id in range(routing.vehicles()):
+            index = routing.Start(vehicle_id)
+            route = []
+            distance = 0
+
+            while not routing.IsEnd(index):
+                node = manager.IndexToNode(index)
+                if node > 0:  # Skip depot
+                    route.append(relocations[node - 1])
+                previous_index = index
+                index = solution.Value(routing.NextVar(index))
+                distance += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
+
+            # Unused vehicles are left out, except in the single-vehicle case
+            if route or routing.vehicles() == 1:
+                route_data["routes"].append(route)
+                route_data["vehicle_stats"].append({
+                    "vehicle": vehicle_id,
+                    "stops": len(route),
+                    "load": sum(r['container_count'] for r in route),
+                    "distance": distance
+                })
+
         return route_data
 
-    def _extract_assignment_solution(self, solver, x, containers, demands):
+    def _extract_assignment_solution(self, solver, x, containers, demands, solver_stats):
         """Extract assignment solution"""
         solution = {
+            "status": solver_stats["status"],
             "assignments": [],
             "unassigned_containers": [],
             "unmet_demands": [],
-            "total_cost": solver.Objective().Value()
+            "total_cost": solver.Objective().Value(),
+            "solver_stats": solver_stats
         }
         
         assigned_containers = set()
@@ -490,13 +1639,9 @@ class ContainerOptimizer:
         # Distance cost
         from_port = container['current_port']
         to_port = demand['port']
-        distance_cost = 0
-        
-        for route in self.routes:
-            if route.from_port == from_port and route.to_port == to_port:
-                distance_cost = route.transport_cost
-                break
-        
+        route = self.route_index.get((from_port, to_port))
+        distance_cost = route.transport_cost if route is not None else 0
+
         # Type mismatch penalty
         type_penalty = 0 if self._is_compatible(container['type'], demand['required_type']) else 1000
         
@@ -531,14 +1676,17 @@ class ContainerOptimizer:
         """Generate actionable recommendations based on optimization results"""
         recommendations = []
         
-        if solution["relocations"]:
-            urgent_relocations = [r for r in solution["relocations"] if r["priority"] == "high"]
+        streamed = solution.get("streamed_relocations", {"count": 0, "high_priority": 0})
+        total_movements = len(solution["relocations"]) + streamed["count"]
+        if total_movements:
+            urgent_relocations = (
+                sum(1 for r in solution["relocations"] if r["priority"] == "high") + streamed["high_priority"]
+            )
             if urgent_relocations:
                 recommendations.append(
-                    f"🚨 {len(urgent_relocations)} urgent relocations needed within 3 days"
+                    f"🚨 {urgent_relocations} urgent relocations needed within 3 days"
                 )
             
-            total_movements = len(solution["relocations"])
             recommendations.append(
                 f"📦 Total optimized movements: {total_movements} container relocations"
             )
@@ -548,44 +1696,632 @@ class ContainerOptimizer:
             recommendations.append(
                 f"💰 Estimated total cost: ${solution['total_cost']:,.2f}"
             )
+
+        if solution.get("rolling_horizon"):
+            recommendations.append(
+                "🪟 Rolling-horizon plan - windows are solved separately, so the full plan is not proven optimal"
+            )
+        elif solution.get("status") == "feasible":
+            recommendations.append(
+                f"⏱️ Solver stopped early - plan is within {solution['solver_stats']['gap']:.1%} of the best bound"
+            )
         
         return recommendations
 
+def flatten_storage_plan(storage_plan: Dict[str, Dict[str, List[int]]]) -> Dict[str, Any]:
+    """
+    Storage plan as one flat array with shape metadata
+
+    values[(i * len(types) + j) * days + t] is the storage of types[j] at
+    ports[i] on day t.
+    """
+    ports = list(storage_plan.keys())
+    types = list(storage_plan[ports[0]].keys()) if ports else []
+    days = len(storage_plan[ports[0]][types[0]]) if types else 0
+    values = [value for port in ports for ctype in types for value in storage_plan[port][ctype]]
+    return {"ports": ports, "types": types, "shape": [len(ports), len(types), days], "values": values}
+
+def run_optimization(optimizer: ContainerOptimizer, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the optimization named by input_data['optimization_type']"""
+    optimization_type = input_data.get('optimization_type', 'redistribution')
+
+    if optimization_type == 'redistribution':
+        result = optimizer.optimize_container_redistribution()
+        if optimizer.options.get('storage_plan_format') == 'flat' and 'storage_plan' in result:
+            result['storage_plan'] = flatten_storage_plan(result['storage_plan'])
+        return result
+    elif optimization_type == 'routing':
+        relocations = input_data.get('relocations', [])
+        return optimizer.optimize_vehicle_routing(relocations)
+    elif optimization_type == 'assignment':
+        # Containers streamed or given column-wise live only in the optimizer's store
+        containers = input_data.get('containers') or optimizer.containers
+        demands = input_data.get('demands', [])
+        return optimizer.optimize_assignment(containers, demands)
+    else:
+        return {"error": f"Unknown optimization type: {optimization_type}"}
+
+class ResultWriter:
+    """
+    Write results to stdout as indented JSON, compact JSON or MessagePack
+
+    In streaming mode each write is one self-contained message: a compact JSON
+    line, or one MessagePack object in a concatenated stream.
+    """
+
+    def __init__(self, output_format: str = 'json', stream: bool = False):
+        if output_format == 'msgpack' and not HAS_MSGPACK:
+            print("[WARNING] msgpack is not installed, writing compact JSON instead", file=sys.stderr)
+            output_format = 'compact'
+        if output_format not in ('json', 'compact', 'msgpack'):
+            raise ValueError(f"Unknown output_format: {output_format}")
+        self.output_format = output_format
+        self.stream = stream
+
+    @staticmethod
+    def _plain(value):
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    def write(self, message: Dict[str, Any]):
+        if self.output_format == 'msgpack':
+            sys.stdout.buffer.write(msgpack.packb(message, default=self._plain, use_bin_type=True))
+            sys.stdout.buffer.flush()
+        elif self.output_format == 'json' and not self.stream:
+            print(json.dumps(message, indent=2, default=self._plain))
+        else:
+            print(json.dumps(message, separators=(',', ':'), default=self._plain), flush=self.stream)
+
+# Per-process base data for batch workers, parsed once by _batch_worker_init
+_BATCH_BASE: Dict[str, Any] = {}
+
+def _batch_worker_init(base_data: Dict[str, Any]):
+    """Parse the shared batch input once per worker process"""
+    optimizer = ContainerOptimizer()
+    if not optimizer.load_data(base_data):
+        raise ValueError("Failed to load batch input data")
+    _BATCH_BASE['optimizer'] = optimizer
+    _BATCH_BASE['data'] = base_data
+
+def _run_batch_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Solve one batch scenario against the worker's shared base data"""
+    start_time = time.perf_counter()
+    base_data = _BATCH_BASE['data']
+
+    # Scenario records, then scenario columns (held only in the view's store), then the base input
+    if 'containers' in scenario:
+        containers = scenario['containers']
+    elif 'containers_columnar' in scenario:
+        containers = None
+    else:
+        containers = base_data.get('containers')
+
+    scenario_input = {
+        'optimization_type': scenario.get('optimization_type', base_data.get('scenario_type', 'redistribution')),
+        'relocations': scenario.get('relocations', base_data.get('relocations', [])),
+        'containers': containers,
+        'demands': scenario.get('demands', base_data.get('demands', []))
+    }
+
+    try:
+        optimizer = _BATCH_BASE['optimizer'].scenario_view(scenario)
+        result = run_optimization(optimizer, scenario_input)
+    except Exception as e:
+        print(f"Error in scenario {scenario.get('id')}: {str(e)}", file=sys.stderr)
+        result = {"error": str(e)}
+
+    return {
+        "id": scenario.get('id'),
+        "optimization_type": scenario_input['optimization_type'],
+        "wall_time_seconds": time.perf_counter() - start_time,
+        "result": result
+    }
+
+def run_batch(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Solve many scenarios against one set of ports, containers and routes
+
+    input_data['scenarios'] lists scenarios with an optional id,
+    optimization_type (default input_data['scenario_type'] or 'redistribution'),
+    overrides for options, ports and routes (see ContainerOptimizer.scenario_view)
+    and their own relocations, containers or demands. Scenarios run across
+    options.batch_workers processes, each of which parses the shared input once.
+    """
+    scenarios = input_data.get('scenarios') or []
+    base_data = {key: value for key, value in input_data.items() if key != 'scenarios'}
+    start_time = time.perf_counter()
+
+    options = input_data.get('options') or {}
+    workers = int(options.get('batch_workers', min(len(scenarios), os.cpu_count() or 1)))
+    workers = max(1, min(workers, len(scenarios) or 1))
+
+    if workers > 1:
+        # Scenario workers already use every CPU; keep assignment solves in-process
+        base_data['options'] = {'assignment_workers': 1, **options}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init,
+                                 initargs=(base_data,)) as pool:
+            results = list(pool.map(_run_batch_scenario, scenarios))
+    else:
+        _batch_worker_init(base_data)
+        results = [_run_batch_scenario(scenario) for scenario in scenarios]
+
+    return {
+        "results": results,
+        "batch_stats": {
+            "scenarios": len(scenarios),
+            "failed": sum(1 for r in results if "error" in r["result"]),
+            "workers": workers,
+            "wall_time_seconds": time.perf_counter() - start_time
+        }
+    }
+
+def load_input(path: str) -> Tuple[Dict[str, Any], Optional[ContainerStore]]:
+    """
+    Read optimizer input from a JSON or NDJSON file
+
+    A .ndjson file holds the input document without containers on its first
+    line, followed by one container record per line. Containers are parsed line
+    by line into a ContainerStore, so the full record list never exists in
+    memory. JSON input may carry containers as a list or column-wise under
+    containers_columnar.
+
+    Returns:
+        (input document, streamed container store or None for JSON input)
+    """
+    if not path.endswith('.ndjson'):
+        with open(path, 'r') as f:
+            return json.load(f), None
+
+    with open(path, 'r') as f:
+        input_data = json.loads(f.readline())
+        store = ContainerStore().extend(json.loads(line) for line in f if line.strip())
+    return input_data, store
+
+def _solve_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Solve one daemon job given as {'input': {...}} or {'input_file': path}"""
+    if 'input_file' in job:
+        input_data, streamed_containers = load_input(job['input_file'])
+    else:
+        input_data, streamed_containers = job['input'], None
+    options = dict(input_data.get('options') or {})
+    cap = job.get('time_limit_cap')
+    if cap is not None:
+        options['time_limit_seconds'] = min(float(options.get('time_limit_seconds', cap)), cap)
+    input_data = {**input_data, 'options': options}
+
+    if input_data.get('optimization_type') == 'batch':
+        if streamed_containers is not None:
+            input_data['containers_columnar'] = streamed_containers.to_columns()
+        return run_batch(input_data)
+
+    optimizer = ContainerOptimizer()
+    if not optimizer.load_data(input_data):
+        return {"error": "Failed to load input data"}
+    if streamed_containers is not None:
+        optimizer.containers = streamed_containers
+    return run_optimization(optimizer, input_data)
+
+def _daemon_worker_loop(conn):
+    """Worker process body: solve jobs received over a pipe until told to stop"""
+    # Lead a process group so a killed job's batch/assignment pools die with it
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    # The parent may own stdout for its protocol; solver logging goes to stderr
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        try:
+            result = _solve_job(job)
+        except Exception as e:
+            result = {"error": str(e)}
+        conn.send(result)
+
+class _DaemonWorker:
+    """A warm worker process; killed and replaced when a job times out or is cancelled"""
+
+    def __init__(self, context):
+        self.context = context
+        self.process = None
+        self.conn = None
+        self.start()
+
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_daemon_worker_loop, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def kill(self):
+        """Kill the worker and every process it started (its process group)"""
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+                self.process.join(timeout=2)
+                # Pool processes that outlived the worker
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # Group gone, or the worker had not called setsid() yet
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+    def restart(self):
+        self.kill()
+        self.conn.close()
+        self.start()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+
+    def run(self, job, deadline, cancelled) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Run a job on this worker
+
+        Returns:
+            ('done', result), ('timeout', None), ('cancelled', None) or ('error', result)
+        """
+        self.conn.send(job)
+        while True:
+            try:
+                if self.conn.poll(0.1):
+                    return 'done', self.conn.recv()
+            except EOFError:
+                self.restart()
+                return 'error', {"error": "Optimizer worker exited unexpectedly"}
+            if cancelled.is_set():
+                self.restart()
+                return 'cancelled', None
+            if deadline is not None and time.monotonic() > deadline:
+                self.restart()
+                return 'timeout', None
+
+class OptimizationDaemon:
+    """
+    Long-lived optimizer that keeps OR-Tools loaded between jobs
+
+    Requests and responses are newline-delimited JSON objects. An 'optimize'
+    request carries the usual optimizer input under 'input' (or a JSON/NDJSON
+    path under 'input_file') and is answered when the job finishes, so clients
+    should send an 'id' (unique among active jobs) to match responses. Jobs wait in a bounded queue and
+    run on a fixed set of warm worker processes. A job that exceeds its time
+    limit or is cancelled has its worker process killed and replaced.
+    """
+
+    def __init__(self, workers=2, max_queue=64, job_timeout=None, grace_seconds=5.0):
+        """
+        Initialize optimization daemon
+
+        Args:
+            workers: Number of jobs solved concurrently
+            max_queue: Jobs allowed to wait before new ones are rejected
+            job_timeout: Default hard limit per job in seconds (None for no limit)
+            grace_seconds: Time between the solver time limit and the hard limit
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.grace_seconds = grace_seconds
+        self.stats = {
+            'started': datetime.now().isoformat(),
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'timed_out': 0,
+            'rejected': 0,
+            'run_seconds_total': 0.0
+        }
+        self._queue = deque()
+        self._running: Dict[Any, Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+        self._job_ids = itertools.count(1)
+        self._stop = False
+        self._threads = []
+        self._workers = []
+
+    def start(self):
+        """Start the worker processes and their dispatcher threads"""
+        # Workers are replaced from dispatcher threads, where forking is unsafe
+        context = multiprocessing.get_context('spawn')
+        for _ in range(self.workers):
+            worker = _DaemonWorker(context)
+            thread = threading.Thread(target=self._dispatch, args=(worker,), daemon=True)
+            self._workers.append(worker)
+            self._threads.append(thread)
+            thread.start()
+
+    def shutdown(self):
+        """Stop accepting work, cancel queued jobs and stop the workers"""
+        with self._condition:
+            self._stop = True
+            queued = list(self._queue)
+            self._queue.clear()
+            for job in self._running.values():
+                job['cancelled'].set()
+            self._condition.notify_all()
+        for job in queued:
+            self._finish(job, 'cancelled', None)
+        for thread in self._threads:
+            thread.join()
+        for worker in self._workers:
+            worker.stop()
+
+    def submit(self, request, respond):
+        """Queue an optimize request; respond(response) is called when it finishes"""
+        job_id = request.get('id')
+        if job_id is None:
+            job_id = f"auto-{next(self._job_ids)}"
+        timeout = request.get('timeout_seconds', self.job_timeout)
+
+        job = {
+            'id': job_id,
+            'payload': {key: request[key] for key in ('input', 'input_file') if key in request},
+            'timeout': float(timeout) if timeout is not None else None,
+            'respond': respond,
+            'cancelled': threading.Event(),
+            'queued_at': time.monotonic()
+        }
+        if not job['payload']:
+            raise ValueError("optimize request needs 'input' or 'input_file'")
+        if job['timeout'] is not None:
+            # Ask the solver to stop in time to return its incumbent
+            job['payload']['time_limit_cap'] = max(1.0, job['timeout'] - self.grace_seconds)
+
+        with self._condition:
+            if self._stop:
+                raise RuntimeError("Daemon is shutting down")
+            if job_id in self._running or any(queued['id'] == job_id for queued in self._queue):
+                raise ValueError(f"Job id {job_id!r} is already queued or running")
+            if len(self._queue) >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise RuntimeError(f"Job queue is full ({self.max_queue} waiting)")
+            self.stats['submitted'] += 1
+            self._queue.append(job)
+            self._condition.notify()
+
+    def cancel(self, job_id) -> bool:
+        """Cancel a queued or running job; returns False if the job is unknown"""
+        with self._condition:
+            for job in self._queue:
+                if job['id'] == job_id:
+                    self._queue.remove(job)
+                    break
+            else:
+                job = self._running.get(job_id)
+                if job is None:
+                    return False
+                job['cancelled'].set()
+                return True
+
+        self._finish(job, 'cancelled', None)
+        return True
+
+    def _dispatch(self, worker):
+        """Feed queued jobs to one worker process"""
+        while True:
+            with self._condition:
+                while not self._queue and not self._stop:
+                    self._condition.wait()
+                if self._stop:
+                    return
+                job = self._queue.popleft()
+                self._running[job['id']] = job
+
+            job['started_at'] = time.monotonic()
+            deadline = job['started_at'] + job['timeout'] if job['timeout'] is not None else None
+            outcome, result = worker.run(job['payload'], deadline, job['cancelled'])
+
+            with self._condition:
+                self._running.pop(job['id'], None)
+            self._finish(job, outcome, result)
+
+    def _finish(self, job, outcome, result):
+        """Record job statistics and send its response"""
+        now = time.monotonic()
+        started = job.get('started_at')
+        timings = {
+            'queued_seconds': round((started if started is not None else now) - job['queued_at'], 4),
+            'run_seconds': round(now - started, 4) if started is not None else 0.0
+        }
+
+        if outcome == 'done' and 'error' not in result:
+            status, key = 'success', 'completed'
+        elif outcome == 'cancelled':
+            status, key = 'cancelled', 'cancelled'
+        elif outcome == 'timeout':
+            status, key = 'timeout', 'timed_out'
+        else:
+            status, key = 'error', 'failed'
+
+        with self._condition:
+            self.stats[key] += 1
+            self.stats['run_seconds_total'] += timings['run_seconds']
+
+        response = {'id': job['id'], 'command': 'optimize', 'status': status, 'timings': timings}
+        if result is not None:
+            response['result'] = result
+        if outcome == 'timeout':
+            response['error'] = f"Job exceeded its {job['timeout']}s time limit"
+        job['respond'](response)
+
+    def queue_stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and counters"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats['queue_depth'] = len(self._queue)
+            stats['running'] = list(self._running)
+        finished = stats['completed'] + stats['failed'] + stats['timed_out']
+        stats['avg_run_seconds'] = stats['run_seconds_total'] / finished if finished else None
+        stats['workers'] = self.workers
+        stats['max_queue'] = self.max_queue
+        return stats
+
+    def handle_request(self, request, respond):
+        """
+        Handle a single decoded request
+
+        Args:
+            request: Dictionary with 'command' ('optimize', 'cancel', 'stats' or 'ping')
+            respond: Callback for the response (called later for 'optimize')
+        """
+        command = request.get('command', 'optimize')
+
+        if command == 'optimize':
+            self.submit(request, respond)
+        elif command == 'cancel':
+            found = self.cancel(request.get('job_id'))
+            respond({'id': request.get('id'), 'command': 'cancel', 'job_id': request.get('job_id'),
+                     'status': 'success' if found else 'error',
+                     **({} if found else {'error': 'Unknown job'})})
+        elif command == 'stats':
+            respond({'id': request.get('id'), 'command': 'stats', 'status': 'success', 'stats': self.queue_stats()})
+        elif command == 'ping':
+            respond({'id': request.get('id'), 'command': 'ping', 'status': 'success'})
+        else:
+            raise ValueError(f"Unknown command '{command}'")
+
+    def serve_stream(self, rfile, wfile):
+        """
+        Serve requests from a binary line stream until EOF, then wait for its jobs
+
+        Args:
+            rfile: Binary stream to read request lines from
+            wfile: Binary stream to write response lines to
+        """
+        write_lock = threading.Lock()
+        outstanding = threading.Semaphore(0)
+        submitted = 0
+
+        def write(response):
+            with write_lock:
+                wfile.write(json.dumps(response, separators=(',', ':'), default=ResultWriter._plain).encode('utf-8') + b'\n')
+                wfile.flush()
+
+        def respond_job(response):
+            write(response)
+            outstanding.release()
+
+        for line in rfile:
+            if not line.strip():
+                continue
+            request = {}
+            try:
+                request = json.loads(line)
+                if request.get('command', 'optimize') == 'optimize':
+                    self.handle_request(request, respond_job)
+                    submitted += 1
+                else:
+                    self.handle_request(request, write)
+            except Exception as e:
+                write({'id': request.get('id'), 'status': 'error', 'error': str(e)})
+
+        # Answer every job from this stream before the caller closes it
+        for _ in range(submitted):
+            outstanding.acquire()
+
+    def serve_forever(self, socket_path=None):
+        """
+        Serve until stdin closes or the daemon is interrupted
+
+        Args:
+            socket_path: Unix socket to listen on; if None, serve over stdin/stdout
+        """
+        # Protocol owns stdout; route all progress logging to stderr
+        protocol_in = sys.stdin.buffer
+        protocol_out = sys.stdout.buffer
+        sys.stdout = sys.stderr
+
+        self.start()
+        try:
+            if socket_path is None:
+                print(f"🔧 Optimizer daemon on stdin/stdout ({self.workers} workers)", file=sys.stderr)
+                self.serve_stream(protocol_in, protocol_out)
+            else:
+                daemon = self
+
+                class _Handler(socketserver.StreamRequestHandler):
+                    def handle(self):
+                        daemon.serve_stream(self.rfile, self.wfile)
+
+                if os.path.exists(socket_path):
+                    os.unlink(socket_path)
+                with socketserver.ThreadingUnixStreamServer(socket_path, _Handler) as unix_server:
+                    unix_server.daemon_threads = True
+                    print(f"🔧 Optimizer daemon on {socket_path} ({self.workers} workers)", file=sys.stderr)
+                    unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+            if socket_path is not None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
 def main():
     """Main function for CLI usage"""
     if len(sys.argv) < 2:
-        print("Usage: python container_optimizer.py <input_json_file>", file=sys.stderr)
+        print("Usage: python container_optimizer.py <input_json_or_ndjson_file>", file=sys.stderr)
+        print("       python container_optimizer.py --daemon [--socket PATH] [--workers N] "
+              "[--max-queue N] [--job-timeout SECONDS]", file=sys.stderr)
         sys.exit(1)
+
+    if sys.argv[1] == '--daemon':
+        args = dict(zip(sys.argv[2::2], sys.argv[3::2]))
+        job_timeout = args.get('--job-timeout')
+        OptimizationDaemon(
+            workers=int(args.get('--workers', 2)),
+            max_queue=int(args.get('--max-queue', 64)),
+            job_timeout=float(job_timeout) if job_timeout is not None else None
+        ).serve_forever(socket_path=args.get('--socket'))
+        return
     
     try:
         # Load input data
-        with open(sys.argv[1], 'r') as f:
-            input_data = json.load(f)
-        
+        input_data, streamed_containers = load_input(sys.argv[1])
+
+        options = input_data.get('options') or {}
+        stream = bool(options.get('stream_relocations')) and input_data.get('optimization_type') != 'batch'
+        writer = ResultWriter(options.get('output_format', 'json'), stream)
+
+        if input_data.get('optimization_type') == 'batch':
+            if streamed_containers is not None:
+                # Workers receive streamed containers column-wise
+                input_data['containers_columnar'] = streamed_containers.to_columns()
+            writer.write(run_batch(input_data))
+            return
+
         # Initialize optimizer
         optimizer = ContainerOptimizer()
         
         if not optimizer.load_data(input_data):
             print('{"error": "Failed to load input data"}')
             sys.exit(1)
+        if streamed_containers is not None:
+            optimizer.containers = streamed_containers
+
+        if stream:
+            # Relocations go out as {"relocation": ...} messages, then {"result": ...}
+            optimizer.relocation_sink = lambda relocation: writer.write({"relocation": relocation})
+            writer.write({"result": run_optimization(optimizer, input_data)})
+            return
+
+        result = run_optimization(optimizer, input_data)
         
-        # Determine optimization type
-        optimization_type = input_data.get('optimization_type', 'redistribution')
-        
-        if optimization_type == 'redistribution':
-            result = optimizer.optimize_container_redistribution()
-        elif optimization_type == 'routing':
-            relocations = input_data.get('relocations', [])
-            result = optimizer.optimize_vehicle_routing(relocations)
-        elif optimization_type == 'assignment':
-            containers = input_data.get('containers', [])
-            demands = input_data.get('demands', [])
-            result = optimizer.optimize_assignment(containers, demands)
-        else:
-            result = {"error": f"Unknown optimization type: {optimization_type}"}
-        
-        # Output result as JSON
-        print(json.dumps(result, indent=2))
+        # Output result
+        writer.write(result)
         
     except Exception as e:
         error_result = {"error": str(e)}